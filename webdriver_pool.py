@@ -1,40 +1,391 @@
-from queue import Queue
-from threading import Lock
+import contextlib
+import itertools
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock, Semaphore
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 
+logger = logging.getLogger(__name__)
+
+# 每个driver到chromedriver的HTTP连接池大小
+HTTP_POOL_MAXSIZE = 20
+# 所有driver共用的Chrome启动参数
+# 关闭扩展、后台网络和同步等功能，并限制V8堆大小，降低每个Chrome实例的内存占用
+_BASE_ARGS = (
+    "--headless=new",
+    "--disable-gpu",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--js-flags=--max-old-space-size=256",
+)
+# 不加载图片时追加的参数，页面DOM中的img标签不受影响
+_NO_IMAGE_ARGS = ("--blink-settings=imagesEnabled=false",)
+_NO_IMAGE_PREFS = {"profile.managed_default_content_settings.images": 2}
+# 存放每个driver独立用户目录的位置，Linux下优先使用内存文件系统
+_PROFILE_ROOT = "/dev/shm" if os.path.isdir("/dev/shm") else None
+# get_driver默认的最长等待时间（秒）
+DEFAULT_ACQUIRE_TIMEOUT = 30
+# 归还时健康检查命令的HTTP超时（秒），避免页面卡死时按默认的约120秒超时阻塞调用方
+HEALTH_CHECK_TIMEOUT = 5
+# 信号量已拿到但driver还在其他线程窃取途中时，重试之间的最长休眠时间（秒）
+_RETRY_SLEEP_MAX = 0.01
+
+
+class PoolExhaustedError(Exception):
+    """在超时时间内没有等到可用的driver"""
+
+
 class WebDriverPool:
-    def __init__(self, pool_size=3):
+    def __init__(self, pool_size=3, min_size=0, disable_images=False, warmup_url=None):
         self.pool_size = pool_size
-        self.drivers = Queue()
+        # 新建的driver先访问一次warmup_url，提前完成TLS握手、连接建立和缓存初始化
+        self.warmup_url = warmup_url
+        # 为True时不下载图片以减少内存和网络开销；依赖图片的页面（懒加载布局、图片内容）渲染会不同，需调用方显式开启
+        self.disable_images = disable_images
+        # 启动时只预先创建min_size个driver，其余在需要时按需创建，最多pool_size个
+        self.min_size = min(min_size, pool_size)
+        self.created = 0
+        # 当前被调用方持有的driver，归还时据此拒绝重复归还或不属于本池的driver
+        self._leased = set()
+        # 单调递增的调试端口计数器，保证并发创建时端口不会重复
+        self._port_counter = itertools.count(9222)
+        # 每个线程第一次使用时按轮转顺序分到一个本地队列，避免所有线程争用同一个队列
+        # （线程ID是对齐的地址，直接取模会让所有线程落到同一个队列）
+        self._thread_local = threading.local()
+        self._index_counter = itertools.count()
+        self.local_pools = [deque() for _ in range(pool_size)]
+        self.local_locks = [Lock() for _ in range(pool_size)]
+        # 记录池中可用driver的总数，所有本地队列都为空时在这里阻塞等待
+        self.available = Semaphore(0)
         self.lock = Lock()
+        # close_all之后为True，此后获取driver直接失败，归还的driver直接关闭
+        self._closed = False
+        # 正阻塞在信号量上的调用方数量，close_all按此数量唤醒它们
+        self._waiters = 0
         self._init_drivers()
-    
+
     def _create_driver(self):
         chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
+        for arg in _BASE_ARGS:
+            chrome_options.add_argument(arg)
+        if self.disable_images:
+            for arg in _NO_IMAGE_ARGS:
+                chrome_options.add_argument(arg)
+            chrome_options.add_experimental_option("prefs", _NO_IMAGE_PREFS)
+        # 每个driver使用独立的用户目录，避免多个Chrome争用默认profile的锁和磁盘缓存
+        profile_dir = tempfile.mkdtemp(prefix="webdriver_pool_", dir=_PROFILE_ROOT)
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
         # 为每个driver分配不同的端口
-        chrome_options.add_argument(f"--remote-debugging-port={9222 + self.drivers.qsize()}")
-        return webdriver.Chrome(options=chrome_options)
-    
+        port = next(self._port_counter)
+        chrome_options.add_argument(f"--remote-debugging-port={port}")
+        try:
+            driver = webdriver.Chrome(options=chrome_options)
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        driver.profile_dir = profile_dir
+        self._tune_connection_pool(driver)
+        if self.warmup_url:
+            self._warm_up(driver)
+        return driver
+
+    def _warm_up(self, driver):
+        """预热driver，失败不影响driver的使用"""
+        try:
+            driver.get(self.warmup_url)
+        except Exception as e:
+            logger.warning(f"预热driver失败: {e}")
+
+    def _tune_connection_pool(self, driver):
+        """扩大driver与chromedriver之间的urllib3连接池，复用keep-alive连接"""
+        # 默认每个host只保留1个连接，并发命令时多余的连接会被直接丢弃并在下次重新建立
+        conn = getattr(driver.command_executor, "_conn", None)
+        if conn is None or not hasattr(conn, "connection_pool_kw"):
+            return
+        conn.connection_pool_kw.update(maxsize=HTTP_POOL_MAXSIZE, block=False)
+        # 清掉创建会话时按默认参数建立的连接池，之后按新参数重新建立
+        conn.clear()
+
     def _init_drivers(self):
-        for _ in range(self.pool_size):
-            driver = self._create_driver()
-            self.drivers.put(driver)
-    
-    def get_driver(self):
-        return self.drivers.get()
-    
+        if self.min_size <= 0:
+            return
+        # Chrome启动主要耗时在进程创建上，并发启动（含预热）可将总耗时降到约一个driver的启动时间
+        drivers = []
+        error = None
+        with ThreadPoolExecutor(max_workers=self.min_size) as executor:
+            futures = [executor.submit(self._create_driver) for _ in range(self.min_size)]
+            # 等所有创建都结束，任何一个失败时关闭已创建的driver，避免chromedriver/Chrome进程泄漏
+            for future in as_completed(futures):
+                try:
+                    drivers.append(future.result())
+                except Exception as e:
+                    if error is None:
+                        error = e
+        if error is not None:
+            for driver in drivers:
+                self._safe_quit(driver)
+            raise error
+        for i, driver in enumerate(drivers):
+            # 初始driver均匀分配到各个本地队列
+            self.local_pools[i % self.pool_size].append(driver)
+            self.created += 1
+            self.available.release()
+
+    def _reserve_slot(self):
+        """占用一个新建driver的名额，池已满时返回False"""
+        with self.lock:
+            if self._closed or self.created >= self.pool_size:
+                return False
+            self.created += 1
+            return True
+
+    def _local_index(self):
+        idx = getattr(self._thread_local, "index", None)
+        if idx is None:
+            with self.lock:
+                idx = next(self._index_counter) % self.pool_size
+            self._thread_local.index = idx
+        return idx
+
+    def _take_half(self, victim):
+        """在持有victim锁的前提下，一次取走其本地队列中约一半的driver"""
+        pool = self.local_pools[victim]
+        stolen = []
+        for _ in range(max(1, len(pool) // 2)):
+            # 窃取者从队头取最久未使用的driver，队列所属线程不加锁从队尾取，可能并发取走最后几个driver
+            try:
+                stolen.append(pool.popleft())
+            except IndexError:
+                break
+        return stolen
+
+    def _steal(self, idx):
+        """从其他线程的本地队列中窃取driver，一次窃取一半，多余的放入自己的本地队列"""
+        stolen = []
+        # 第一轮只尝试非阻塞加锁，忙碌的队列直接跳过
+        for offset in range(1, self.pool_size):
+            victim = (idx + offset) % self.pool_size
+            lock = self.local_locks[victim]
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                stolen = self._take_half(victim)
+            finally:
+                lock.release()
+            if stolen:
+                break
+        # 第二轮阻塞加锁，保证信号量计数对应的driver一定能被取到
+        if not stolen:
+            for offset in range(1, self.pool_size):
+                victim = (idx + offset) % self.pool_size
+                with self.local_locks[victim]:
+                    stolen = self._take_half(victim)
+                if stolen:
+                    break
+        if not stolen:
+            return None
+        driver = stolen.pop()
+        self.local_pools[idx].extend(stolen)
+        return driver
+
+    def _check_open(self):
+        if self._closed:
+            raise PoolExhaustedError("driver池已关闭")
+
+    def get_driver(self, timeout=DEFAULT_ACQUIRE_TIMEOUT):
+        driver = self._take_driver(timeout)
+        self._leased.add(driver)
+        return driver
+
+    def _take_driver(self, timeout):
+        self._check_open()
+        deadline = time.monotonic() + timeout
+        if not self.available.acquire(blocking=False):
+            # 池中暂无空闲driver，未达到上限时在锁外创建新的driver
+            if self._reserve_slot():
+                try:
+                    return self._create_driver()
+                except Exception:
+                    with self.lock:
+                        self.created -= 1
+                    raise
+            # 不无限等待，避免driver全部泄漏或卡死时调用方永久阻塞；等待和后面的重试共用同一个截止时间
+            with self.lock:
+                self._check_open()
+                self._waiters += 1
+            try:
+                acquired = self.available.acquire(timeout=max(0, deadline - time.monotonic()))
+            finally:
+                with self.lock:
+                    self._waiters -= 1
+            # close_all唤醒的调用方在这里发现池已关闭
+            self._check_open()
+            if not acquired:
+                raise PoolExhaustedError(f"等待{timeout}秒后仍没有可用的driver（池大小: {self.pool_size}）")
+        idx = self._local_index()
+        delay = 0
+        while True:
+            # close_all可能已经把名额对应的driver取走，此时不能继续空转
+            self._check_open()
+            # deque的append/pop在GIL下是原子操作，本地队列的存取不需要加锁，
+            # 本地队列的锁只用于串行化窃取者。
+            # 按后进先出取刚归还的driver，其页面缓存、DNS缓存和V8状态都还是热的
+            try:
+                return self.local_pools[idx].pop()
+            except IndexError:
+                pass
+            driver = self._steal(idx)
+            if driver is not None:
+                return driver
+            if time.monotonic() >= deadline:
+                # 名额对应的driver还在其他线程的窃取途中，交还名额后按超时失败
+                self.available.release()
+                raise PoolExhaustedError(f"等待{timeout}秒后仍没有可用的driver（池大小: {self.pool_size}）")
+            # 先让出GIL，之后逐步加长休眠，避免空转占满CPU、拖慢正在把driver放回队列的线程
+            time.sleep(delay)
+            delay = min(delay * 2 or 0.0005, _RETRY_SLEEP_MAX)
+
+    @contextlib.contextmanager
+    def acquire(self, timeout=DEFAULT_ACQUIRE_TIMEOUT):
+        """以上下文管理器的方式获取driver，退出时（包括发生异常）自动归还
+
+        用法: with pool.acquire() as driver: ...
+        """
+        driver = self.get_driver(timeout)
+        try:
+            yield driver
+        finally:
+            self.return_driver(driver)
+
+    def _is_alive(self, driver):
+        """检查driver是否仍然可用：chromedriver进程存活且能在HEALTH_CHECK_TIMEOUT秒内响应命令"""
+        service = getattr(driver, "service", None)
+        process = getattr(service, "process", None)
+        if process is not None and process.poll() is not None:
+            return False
+        # 探测命令临时使用较短的HTTP超时，client_config是每个driver自己的连接配置
+        client_config = getattr(getattr(driver, "command_executor", None), "_client_config", None)
+        original_timeout = getattr(client_config, "timeout", None)
+        if client_config is not None:
+            client_config.timeout = HEALTH_CHECK_TIMEOUT
+        try:
+            driver.execute_script("return 1")
+        except Exception:
+            return False
+        finally:
+            if client_config is not None:
+                client_config.timeout = original_timeout
+        return True
+
     def return_driver(self, driver):
-        self.drivers.put(driver)
-    
+        try:
+            # set.remove在GIL下是原子操作，同一个driver并发重复归还时只有一次成功
+            self._leased.remove(driver)
+        except KeyError:
+            # 不接收未登记的driver，否则created与实际数量不一致，池会超过pool_size
+            logger.warning("归还的driver不是从池中取出的或已经归还过，忽略")
+            return
+        if self._closed:
+            # 池已关闭，归还的driver直接关闭
+            self._discard(driver)
+            return
+        if not self._is_alive(driver):
+            # 已失效的driver不再放回池中，释放名额后由下一次get_driver按需创建新的driver
+            logger.warning("归还的driver已失效，关闭并替换")
+            self._discard(driver)
+            return
+        self.local_pools[self._local_index()].append(driver)
+        self.available.release()
+
+    def _discard(self, driver):
+        """关闭不再放回池中的driver并释放其创建名额"""
+        with self.lock:
+            self.created -= 1
+        self._safe_quit(driver)
+
+    def _drain_local(self, idx):
+        """取出某个本地队列中当前的全部driver"""
+        pool = self.local_pools[idx]
+        drained = []
+        with self.local_locks[idx]:
+            # 按调用时的长度取，关闭过程中其他线程继续归还的driver不会让这里一直循环
+            for _ in range(len(pool)):
+                try:
+                    drained.append(pool.popleft())
+                except IndexError:
+                    break
+        for _ in drained:
+            self.available.acquire(blocking=False)
+        return drained
+
     def close_all(self):
-        while not self.drivers.empty():
-            driver = self.drivers.get()
-            try:
-                driver.quit()
-            except:
-                pass
\ No newline at end of file
+        with self.lock:
+            self._closed = True
+        drivers = []
+        for idx in range(self.pool_size):
+            drivers.extend(self._drain_local(idx))
+        with self.lock:
+            # 取出的driver不再计入已创建数量，仍被调用方持有的driver在归还时计减
+            self.created -= len(drivers)
+            waiters = self._waiters
+        # 唤醒阻塞在信号量上的调用方，让它们立即失败而不是等到超时
+        for _ in range(waiters):
+            self.available.release()
+        if not drivers:
+            return
+        # 每个quit都要等待HTTP往返和进程退出，并发关闭使总耗时与driver数量无关
+        with ThreadPoolExecutor(max_workers=len(drivers)) as executor:
+            list(executor.map(self._safe_quit, drivers))
+
+    def _safe_quit(self, driver):
+        """关闭driver，quit失败时强制结束chromedriver进程，避免残留Chrome进程"""
+        service = getattr(driver, "service", None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"关闭driver失败，强制结束进程: {e}")
+            process = getattr(service, "process", None)
+            if process is not None:
+                try:
+                    process.kill()
+                except Exception as kill_error:
+                    logger.error(f"强制结束driver进程失败: {kill_error}")
+        finally:
+            # 停止chromedriver服务并关闭其日志文件和socket
+            if service is not None:
+                try:
+                    service.stop()
+                except Exception as e:
+                    logger.warning(f"停止chromedriver服务失败: {e}")
+            profile_dir = getattr(driver, "profile_dir", None)
+            if profile_dir:
+                shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+# get_pool创建的共享池，按pool_size区分
+_shared_pools = {}
+_shared_pools_lock = Lock()
+
+
+def get_pool(pool_size=3):
+    """获取共享的WebDriverPool，推荐通过此函数而不是直接实例化WebDriverPool
+
+    相同pool_size只会创建一个池（无论按位置还是按关键字传参），避免每个请求各自创建池而启动大量Chrome进程；
+    池被close_all关闭后，下次调用会重新创建
+    """
+    pool_size = int(pool_size)
+    with _shared_pools_lock:
+        pool = _shared_pools.get(pool_size)
+        if pool is None or pool._closed:
+            pool = _shared_pools[pool_size] = WebDriverPool(pool_size)
+        return pool
\ No newline at end of file
@@ -1,34 +1,65 @@
+import os
 import re
+import asyncio
+import copy
+import functools
+import hashlib
 import logging
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from lxml import html
+from lxml import html, etree
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 import markdownify
 import uvicorn
 
+try:
+    import ahocorasick
+except ImportError:  # 未安装 pyahocorasick 时退回逐个子串查找
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时用标准库 json 序列化响应
+    orjson = None
+
 # 配置日志
 def setup_logging():
-    """设置日志配置"""
+    """
+    设置日志配置，重复调用（如模块被再次导入）时直接返回已配置的日志器
+    逐个容器的评分和清理细节记为DEBUG，需要时设置环境变量 XPATH_LOG_LEVEL=DEBUG
+    """
+    file_logger = logging.getLogger('file_only')
+    if file_logger.handlers:
+        return file_logger
+    
     # 创建日志文件名（包含时间戳）
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_filename = f"xpath_processing_{timestamp}.log"
     
+    # 根日志器和文件日志器共用同一个文件处理器，日志文件只打开一次
+    file_handler = logging.FileHandler(log_filename, encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    
     # 配置日志格式
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler(log_filename, encoding='utf-8'),
+            file_handler,
             logging.StreamHandler()  # 保留控制台输出，但只显示重要信息
         ]
     )
     
     # 创建专门的文件日志器（不输出到控制台）
-    file_logger = logging.getLogger('file_only')
-    file_logger.setLevel(logging.INFO)
-    file_handler = logging.FileHandler(log_filename, encoding='utf-8')
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    # XPATH_LOG_LEVEL 取值无效时回退到INFO，不让导入时就报错
+    log_level = logging.getLevelName(os.environ.get('XPATH_LOG_LEVEL', 'INFO').upper())
+    if not isinstance(log_level, int):
+        log_level = logging.INFO
+    file_logger.setLevel(log_level)
     file_logger.addHandler(file_handler)
     file_logger.propagate = False  # 防止传播到根日志器
     
@@ -38,14 +69,241 @@ def setup_logging():
 # 初始化日志
 logger = setup_logging()
 
+# 首部/尾部内容特征关键词
+HEADER_CONTENT_KEYWORDS = (
+    '登录', '注册', '首页', '主页', '无障碍', '办事', '无障碍浏览','打印','收藏','机构概况','在线服务','互动交流',
+    '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府',
+    'login', 'register', 'home', 'menu', 'search', 'nav'
+)
+FOOTER_CONTENT_KEYWORDS = (
+    '网站说明', '网站标识码', '版权所有', '主办单位', '承办单位', 
+    '技术支持', '联系我们', '网站地图', '隐私政策', '免责声明',
+    '备案号', 'icp', '公安备案', '政府网站', '网站管理',
+    'copyright', 'all rights reserved', 'powered by', 'designed by'
+)
+
+class KeywordMatcher:
+    """
+    统计文本中出现了几个关键词，结果与 sum(1 for kw in keywords if kw in text) 一致；
+    安装了 pyahocorasick 时用 Aho-Corasick 自动机一次扫描完成，
+    否则先用预编译的正则一次扫描判断是否有任何关键词，命中后再逐个统计
+    """
+    def __init__(self, keywords):
+        self.keywords = tuple(keywords)
+        self._weights = Counter(self.keywords)
+        self._gate = re.compile('|'.join(re.escape(keyword) for keyword in self._weights))
+        self._automaton = None
+        if ahocorasick is not None and '' not in self._weights:
+            automaton = ahocorasick.Automaton()
+            for keyword in self._weights:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def count(self, *texts):
+        """统计出现在任一文本中的关键词个数"""
+        if self._automaton is None:
+            if not any(self._gate.search(text) for text in texts):
+                return 0
+            return sum(1 for keyword in self.keywords if any(keyword in text for text in texts))
+        found = set()
+        for text in texts:
+            found.update(keyword for _, keyword in self._automaton.iter(text))
+        return sum(self._weights[keyword] for keyword in found)
+
+    def any(self, *texts):
+        """是否有任一关键词出现在任一文本中，找到第一个就停止扫描"""
+        if self._automaton is None:
+            return any(self._gate.search(text) for text in texts)
+        return any(next(self._automaton.iter(text), None) is not None for text in texts)
+
+    def found(self, *texts):
+        """按关键词列表的顺序返回出现在任一文本中的关键词"""
+        if self._automaton is None:
+            if not any(self._gate.search(text) for text in texts):
+                return []
+            return [keyword for keyword in self.keywords if any(keyword in text for text in texts)]
+        hits = set()
+        for text in texts:
+            hits.update(keyword for _, keyword in self._automaton.iter(text))
+        return [keyword for keyword in self.keywords if keyword in hits]
+
+class KeywordGroups:
+    """
+    几组关键词共用一个 KeywordMatcher：对文本只扫描一次，再按组返回命中的关键词（保持各组内的顺序）
+    """
+    def __init__(self, *groups):
+        self.groups = tuple(tuple(group) for group in groups)
+        self._matcher = KeywordMatcher([keyword for group in self.groups for keyword in group])
+
+    def found(self, *texts):
+        """返回每组中出现在任一文本里的关键词列表"""
+        hits = set(self._matcher.found(*texts))
+        return tuple([keyword for keyword in group if keyword in hits] for group in self.groups)
+
+def _compile_indicators(indicators):
+    """把class/id特征词列表编译成一个正则，一次扫描判断是否命中任一特征词"""
+    return re.compile('|'.join(re.escape(indicator) for indicator in indicators))
+
+# 词元由字母数字、下划线和连字符组成，其余字符都是分隔符
+_RE_TOKEN_SEPARATOR = re.compile(r'[^\w-]+')
+# 忽略大小写的正则会把这两个字符当作 i、s，拆词前先换掉，与整词正则匹配的结果保持一致
+_CASELESS_LOOKALIKES = str.maketrans({'ı': 'i', 'ſ': 's'})
+
+def _word_tokens(text):
+    """
+    把已转小写的 class/id 文本拆成词元集合；
+    关键词在集合中等价于关键词两侧不是字母数字、下划线或连字符
+    """
+    return frozenset(_RE_TOKEN_SEPARATOR.split(text.translate(_CASELESS_LOOKALIKES)))
+
+def _class_id_text(element, *extra):
+    """
+    小写的 "class id" 字符串；特征词都不含空格，
+    在拼接后的字符串里匹配等价于分别在class和id里匹配
+    """
+    return ' '.join((element.get('class', ''), element.get('id', '')) + extra).lower()
+
+_HEADER_CONTENT_MATCHER = KeywordMatcher(HEADER_CONTENT_KEYWORDS)
+_FOOTER_CONTENT_MATCHER = KeywordMatcher(FOOTER_CONTENT_KEYWORDS)
+
+# 预编译的XPath表达式，避免每次调用都重新解析
+# 一次遍历找出文字包含任一首部/尾部关键词的元素；关键词通过XPath变量传入，不拼进表达式，无需处理引号转义
+_HEADER_FOOTER_TEXT_VARS = {
+    f"kw{i}": kw for i, kw in enumerate(HEADER_CONTENT_KEYWORDS + FOOTER_CONTENT_KEYWORDS)
+}
+_XP_HEADER_FOOTER_TEXT = etree.XPath("//*[" + " or ".join(
+    f"contains(text(), ${name})" for name in _HEADER_FOOTER_TEXT_VARS
+) + "]")
+# contains(text(), ...) 只比较第一个文本节点
+_XP_FIRST_TEXT = etree.XPath("string(text())")
+_XP_BODY = etree.XPath("//body")
+_XP_STYLED = etree.XPath(".//*[@style]")
+_XP_CHILD_DIVS = etree.XPath("./div")
+_XP_TOPLEVEL = etree.XPath("./div | ./section | ./main | ./article | ./header | ./footer | ./nav | ./aside")
+_XP_DIRECT_CONTENT_CHILDREN = etree.XPath("./div | ./section | ./main | ./article")
+_XP_LOCAL_CONTENT_CHILDREN = etree.XPath("./div | ./section | ./article")
+# 列表容器查找的第一层列表项选择器，逐个执行并保留各自的结果（重复命中会计入父元素计数）
+_XP_LIST_SELECTORS = tuple(etree.XPath(selector) for selector in (
+    "//li", "//tr", "//article",
+    "//div[contains(@class, 'item')]",
+    "//div[contains(@class, 'list')]",
+    "//ul//li", "//ol//li", "//table//tr",
+    "//section//ul[contains(@class, 'item')]",
+    "//section//ul[contains(@class, 'list')]",
+    "//section//div[contains(@class, 'list')]",
+    "//section//div[contains(@class, 'item')]"
+))
+_XP_ALL_DESCENDANTS = etree.XPath(".//*")
+# 只计数的查询不会为每个节点创建Python代理对象
+_XP_COUNT_DESCENDANTS = etree.XPath("count(.//*)")
+_XP_COUNT_LINKS = etree.XPath("count(.//a)")
+_XP_COUNT_IMGS = etree.XPath("count(.//img)")
+_XP_HREF_LINKS = etree.XPath(".//a[@href]")
+_XP_COUNT_STRUCTURED = etree.XPath(
+    "count(.//p | .//h1 | .//h2 | .//h3 | .//h4 | .//h5 | .//h6 | .//li | .//table"
+    " | .//div[contains(@class,'content')] | .//section)"
+)
+# 与 _XP_COUNT_STRUCTURED 对应的标签（div需要另外检查class）
+_STRUCTURED_TAGS = frozenset(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'table', 'section'])
+# 文章特征（标题、文章元信息、多个段落）整体在libxml2里求值，只返回布尔值，不生成元素列表
+_XP_HAS_ARTICLE_FEATURES = etree.XPath(
+    ".//h1 or .//h2 or .//h3"
+    " or .//*[contains(text(), '发布时间') or contains(text(), '来源') or contains(text(), '浏览次数')]"
+    " or count(.//p) > 3"
+)
+_XP_DIVS_WITH_HEADER_FOOTER = etree.XPath(".//div[.//header] | .//div[.//footer] | .//div[.//nav]")
+# 语义标签按 (标签, role) 规则排列，顺序即删除顺序
+_PAGE_SEMANTIC_RULES = (('header', None), ('footer', None), ('nav', None))
+_SEMANTIC_INTERFERENCE_RULES = _PAGE_SEMANTIC_RULES + (
+    ('aside', None), ('div', 'navigation'), ('div', 'banner'),
+    ('div', 'contentinfo'), ('section', 'navigation')
+)
+_XP_PAGE_SEMANTIC_TAGS = etree.XPath("//header | //footer | //nav")
+_XP_SEMANTIC_INTERFERENCE = etree.XPath(
+    "//header | //footer | //nav | //aside | //div[@role='navigation'] | //div[@role='banner']"
+    " | //div[@role='contentinfo'] | //section[@role='navigation']"
+)
+_XP_CONTENT_CONTAINERS = etree.XPath(".//div | .//section | .//article | .//main")
+_XP_PRINT_CONTENT = etree.XPath(".//*[@id='printContent' or @id='printcontent']")
+
+# 常用的标签/role集合；lxml.html 解析出的标签名都是小写，不需要再 lower()
+_ROOT_TAGS = frozenset(['body', 'html'])
+# 列表项标签（class 含 item 的 div 另外判断）
+_LIST_ITEM_TAGS = frozenset(['li', 'tr', 'article'])
+_TOP_LEVEL_TAGS = frozenset(['html', 'head', 'body', 'script', 'meta'])
+_INTERFERENCE_TAGS = frozenset(['header', 'footer', 'nav', 'aside'])
+_PAGE_LEVEL_TAGS = frozenset(['header', 'footer', 'nav'])
+_TRACEBACK_CONTAINER_TAGS = frozenset(['div', 'section', 'header', 'footer', 'nav', 'aside'])
+_FOOTER_TRACEBACK_CONTAINER_TAGS = frozenset(['div', 'section', 'footer'])
+_MEANINGFUL_PARENT_TAGS = frozenset(['div', 'section', 'article', 'main'])
+_LIST_HEADER_TAGS = frozenset(['header', 'nav', 'menu'])
+_LIST_ANCESTOR_HEADER_TAGS = frozenset(['header', 'nav'])
+_CONTENT_ROLES = frozenset(['list', 'listbox', 'grid', 'main', 'article'])
+_PAGE_LEVEL_ROLES = frozenset(['banner', 'navigation', 'contentinfo'])
+
 # FastAPI应用
 app = FastAPI(
     title="HTML to Markdown Content Extractor",
     description="Extract main content from HTML and convert to Markdown",
-    version="2.0.0"
+    version="2.0.0",
+    # 大段 markdown 的响应序列化用 orjson 更快
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
 )
 
 # Pydantic模型
+def _semantic_rank(element, rules):
+    """返回元素命中的规则序号"""
+    role = element.get('role')
+    for rank, (tag, rule_role) in enumerate(rules):
+        if element.tag == tag and (rule_role is None or role == rule_role):
+            return rank
+    return None
+
+def _semantic_removal_order(elements, rules):
+    """
+    将一次联合查询的结果排成逐条规则依次删除时的顺序：
+    先按规则顺序、再按文档顺序；祖先已被更早规则删除的元素不会再被找到，直接跳过
+    """
+    ranks = {id(element): _semantic_rank(element, rules) for element in elements}
+    ordered = []
+    for element in elements:
+        rank = ranks[id(element)]
+        if any(ranks.get(id(ancestor), rank) < rank for ancestor in element.iterancestors()):
+            continue
+        ordered.append(element)
+    ordered.sort(key=lambda element: ranks[id(element)])
+    return ordered
+
+def _strip_semantic_elements(body, elements, rules):
+    """
+    删除 _semantic_removal_order 排好序的语义元素，返回实际删除的元素
+    纯标签规则交给 etree.strip_elements 在C层一次删完（tail一并删除，与 parent.remove 一致），带role的规则逐个删除
+    """
+    removed = [element for element in elements if element.getparent() is not None]
+    etree.strip_elements(body.getroottree(), *[tag for tag, role in rules if role is None], with_tail=True)
+    for element in removed:
+        if rules[_semantic_rank(element, rules)][1] is not None:
+            element.getparent().remove(element)
+    return removed
+
+def _has_marked_ancestor(element, marked, root):
+    """element 在 root 之内是否有祖先已被标记删除"""
+    for ancestor in element.iterancestors():
+        if ancestor is root:
+            return False
+        if id(ancestor) in marked:
+            return True
+    return False
+
+def _outermost_containers(containers, root):
+    """
+    去掉祖先也在待删除集合中的元素，祖先被删除时它们会一并移除
+    只看 root 以内的祖先：root 本身被移出文档后调用方仍会继续使用它
+    """
+    marked = {id(container) for container in containers}
+    return [container for container in containers if not _has_marked_ancestor(container, marked, root)]
+
 class HTMLInput(BaseModel):
     html_content: str
     
@@ -57,67 +315,59 @@ class MarkdownOutput(BaseModel):
 # 移除了浏览器相关的函数，现在只处理HTML内容
 def remove_header_footer_by_content_traceback(body):
     
-    # 首部内容特征关键词
-    header_content_keywords = [
-        '登录', '注册', '首页', '主页', '无障碍', '办事', '无障碍浏览','打印','收藏','机构概况','在线服务','互动交流',
-        '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府',
-        'login', 'register', 'home', 'menu', 'search', 'nav'
-    ]
+    header_content_keywords = HEADER_CONTENT_KEYWORDS
+    footer_content_keywords = FOOTER_CONTENT_KEYWORDS
     
-    # 尾部内容特征关键词
-    footer_content_keywords = [
-        '网站说明', '网站标识码', '版权所有', '主办单位', '承办单位', 
-        '技术支持', '联系我们', '网站地图', '隐私政策', '免责声明',
-        '备案号', 'icp', '公安备案', '政府网站', '网站管理',
-        'copyright', 'all rights reserved', 'powered by', 'designed by'
-    ]
+    # 一次查询取出所有候选元素，再按关键词顺序分到首部/尾部
+    matched = [(element, _XP_FIRST_TEXT(element)) for element in _XP_HEADER_FOOTER_TEXT(body, **_HEADER_FOOTER_TEXT_VARS)]
     
     # 查找包含首部特征文字的元素
     header_elements = []
     for keyword in header_content_keywords:
-        xpath = f"//*[contains(text(), '{keyword}')]"
-        elements = body.xpath(xpath)
-        header_elements.extend(elements)
+        header_elements.extend(element for element, text in matched if keyword in text)
     
     # 查找包含尾部特征文字的元素
     footer_elements = []
     for keyword in footer_content_keywords:
-        xpath = f"//*[contains(text(), '{keyword}')]"
-        elements = body.xpath(xpath)
-        footer_elements.extend(elements)
+        footer_elements.extend(element for element, text in matched if keyword in text)
     
-    # 收集需要删除的容器
-    containers_to_remove = set()
+    # 命中多个关键词的元素只回溯一次（保留首次出现的顺序）
+    header_elements = list(dict.fromkeys(header_elements))
+    footer_elements = list(dict.fromkeys(footer_elements))
     
-    # 处理首部元素
+    # 收集需要删除的容器（按id去重，按发现顺序删除）
+    containers_to_remove = {}
+    
+    # 处理首部元素，共享祖先的回溯结果
+    traceback_cache = {}
     for element in header_elements:
-        container = find_header_footer_container(element)
-        if container and container not in containers_to_remove:
-            containers_to_remove.add(container)
-            logger.info(f"发现首部容器: {container.tag} class='{container.get('class', '')[:50]}'")
+        container = find_header_footer_container(element, traceback_cache)
+        if container and id(container) not in containers_to_remove:
+            containers_to_remove[id(container)] = container
+            logger.debug(f"发现首部容器: {container.tag} class='{container.get('class', '')[:50]}'")
     
     # 处理尾部元素
     for element in footer_elements:
         container = find_footer_container_by_traceback(element)
-        if container and container not in containers_to_remove:
-            containers_to_remove.add(container)
-            logger.info(f"发现尾部容器: {container.tag} class='{container.get('class', '')[:50]}'")
+        if container and id(container) not in containers_to_remove:
+            containers_to_remove[id(container)] = container
+            logger.debug(f"发现尾部容器: {container.tag} class='{container.get('class', '')[:50]}'")
     
     # 额外检查：查找所有直接包含header/footer标签的div容器
-    header_divs = body.xpath(".//div[.//header] | .//div[.//footer] | .//div[.//nav]")
+    header_divs = _XP_DIVS_WITH_HEADER_FOOTER(body)
     for div in header_divs:
         # 检查这个div是否包含首部/尾部内容特征
         div_text = div.text_content().lower()
         
-        header_count = sum(1 for keyword in header_content_keywords if keyword in div_text)
-        footer_count = sum(1 for keyword in footer_content_keywords if keyword in div_text)
+        header_count = _HEADER_CONTENT_MATCHER.count(div_text)
+        footer_count = _FOOTER_CONTENT_MATCHER.count(div_text)
         
         if header_count >= 2 or footer_count >= 2:
-            if div not in containers_to_remove:
-                containers_to_remove.add(div)    
+            if id(div) not in containers_to_remove:
+                containers_to_remove[id(div)] = div
     # 删除容器
     removed_count = 0
-    for container in containers_to_remove:
+    for container in _outermost_containers(list(containers_to_remove.values()), body):
         try:
             parent = container.getparent()
             if parent is not None:
@@ -128,65 +378,79 @@ def remove_header_footer_by_content_traceback(body):
     
     return body
 
-def find_header_footer_container(element):
-    """通过回溯找到包含首部/尾部特征的容器 - 增强版"""
+# 包装div的首部/尾部内容特征关键词
+_WRAPPER_HEADER_MATCHER = KeywordMatcher([
+    '登录', '注册', '首页', '主页', '无障碍',  '办事',  '无障碍浏览','打印','收藏','机构概况','在线服务','互动交流', 
+    '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府'
+])
+_WRAPPER_FOOTER_MATCHER = KeywordMatcher([
+    '网站说明', '网站标识码', '版权所有', '主办单位', '承办单位', 
+    '技术支持', '联系我们', '网站地图', '隐私政策', '免责声明',
+    '备案号', 'icp', '公安备案', '政府网站', '网站管理'
+])
+
+# 首部结构特征 + 尾部结构特征
+_RE_TRACEBACK_INDICATORS = _compile_indicators([
+    'header', 'nav', 'navigation', 'menu', 'topbar', 'banner', 'menubar', 'head',
+    'footer', 'foot', 'bottom', 'end', 'copyright', 'links', 'sitemap', 'contact'
+])
+
+def _traceback_structural_container(element, cache):
+    """
+    向上回溯，返回第一个带首部/尾部结构特征的容器，找不到返回None
+    途经的每个节点都记入cache，兄弟元素再回溯时遇到已访问的祖先直接复用结果
+    """
+    path = []
+    result = None
     current = element
     
     # 向上回溯查找容器
     while current is not None and current.tag != 'html':
+        if current in cache:
+            result = cache[current]
+            break
+        path.append(current)
+        
         # 检查当前元素是否为容器（div、section、header、footer、nav等）
-        if current.tag in ['div', 'section', 'header', 'footer', 'nav', 'aside']:
-            # 检查容器是否包含首部/尾部结构特征
-            classes = current.get('class', '').lower()
-            elem_id = current.get('id', '').lower()
-            tag_name = current.tag.lower()
-            
-            # 首部结构特征
-            header_indicators = ['header', 'nav', 'navigation', 'menu', 'topbar', 'banner', 'menubar', 'head']
-            # 尾部结构特征
-            footer_indicators = ['footer', 'foot', 'bottom', 'end', 'copyright', 'links', 'sitemap', 'contact']
-            
-            # 检查是否包含首部或尾部结构特征
-            for indicator in header_indicators + footer_indicators:
-                if (indicator in classes or indicator in elem_id or indicator in tag_name):
-                    return current
+        if current.tag in _TRACEBACK_CONTAINER_TAGS:
+            # 检查容器的class、id和标签名是否包含首部/尾部结构特征
+            if _RE_TRACEBACK_INDICATORS.search(_class_id_text(current, current.tag)):
+                result = current
+                break
         
         # 检查是否到达顶层标签
         parent = current.getparent()
-        if parent is None or parent.tag in ['html', 'head', 'body', 'script', 'meta']:
+        if parent is None or parent.tag in _TOP_LEVEL_TAGS:
             # 如果父级是html或body，说明已经到顶了
             break
         
         # 继续向上查找
         current = parent
     
+    for node in path:
+        cache[node] = result
+    return result
+
+def find_header_footer_container(element, cache=None):
+    """通过回溯找到包含首部/尾部特征的容器 - 增强版"""
+    container = _traceback_structural_container(element, {} if cache is None else cache)
+    if container is not None:
+        return container
+    
     # 特殊处理：如果当前元素被div包装，但div本身没有明显特征
     # 检查当前元素的父级是否是div，且祖父级是body/html
     if (element.getparent() and 
         element.getparent().tag == 'div' and 
         element.getparent().getparent() and 
-        element.getparent().getparent().tag in ['body', 'html']):
+        element.getparent().getparent().tag in _ROOT_TAGS):
         
         # 检查这个div是否包含首部/尾部内容特征
         div_element = element.getparent()
         div_text = div_element.text_content().lower()
         
-        # 首部内容特征关键词
-        header_content_keywords = [
-            '登录', '注册', '首页', '主页', '无障碍',  '办事',  '无障碍浏览','打印','收藏','机构概况','在线服务','互动交流', 
-            '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府'
-        ]
-        
-        # 尾部内容特征关键词
-        footer_content_keywords = [
-            '网站说明', '网站标识码', '版权所有', '主办单位', '承办单位', 
-            '技术支持', '联系我们', '网站地图', '隐私政策', '免责声明',
-            '备案号', 'icp', '公安备案', '政府网站', '网站管理'
-        ]
-        
         # 检查是否包含多个首部或尾部关键词
-        header_count = sum(1 for keyword in header_content_keywords if keyword in div_text)
-        footer_count = sum(1 for keyword in footer_content_keywords if keyword in div_text)
+        header_count = _WRAPPER_HEADER_MATCHER.count(div_text)
+        footer_count = _WRAPPER_FOOTER_MATCHER.count(div_text)
         
         if header_count >= 2 or footer_count >= 2:
             return div_element
@@ -196,26 +460,23 @@ def find_header_footer_container(element):
         return element.getparent()
     
     return None
+# footer结构特征
+_RE_FOOTER_TRACEBACK_INDICATORS = _compile_indicators(['footer', 'foot', 'bottom', 'end', 'copyright'])
+
 def find_footer_container_by_traceback(element):
     """通过回溯找到footer容器"""
     current = element
     
     while current is not None:
         # 检查当前元素是否为容器
-        if current.tag in ['div', 'section', 'footer']:
-            # 检查容器特征
-            classes = current.get('class', '').lower()
-            elem_id = current.get('id', '').lower()
-            
-            # footer结构特征
-            footer_indicators = ['footer', 'foot', 'bottom', 'end', 'copyright']
-            for indicator in footer_indicators:
-                if indicator in classes or indicator in elem_id:
-                    return current
+        if current.tag in _FOOTER_TRACEBACK_CONTAINER_TAGS:
+            # 检查容器的class和id是否包含footer结构特征
+            if _RE_FOOTER_TRACEBACK_INDICATORS.search(_class_id_text(current)):
+                return current
         
         # 检查是否到达顶层标签
         parent = current.getparent()
-        if parent is None or parent.tag in ['html', 'head', 'body', 'script', 'meta']:
+        if parent is None or parent.tag in _TOP_LEVEL_TAGS:
             break
             
         current = parent
@@ -226,7 +487,7 @@ def preprocess_html_remove_interference(page_tree):
     精准清理HTML - 只激进删除页面级header和footer，保护内容区域
     """
     # 获取body元素
-    body_elements = page_tree.xpath("//body")
+    body_elements = _XP_BODY(page_tree)
     if body_elements:
         body = body_elements[0]
     else:
@@ -249,11 +510,12 @@ def preprocess_html_remove_interference(page_tree):
     
     logger.info(f"精准清理完成：删除了 {removed_count} 个页面级header/footer")
     
-    # 输出清理后的HTML到日志文件
-    cleaned_html = html.tostring(body, encoding='unicode', pretty_print=True)
-    logger.info("\n=== 清理后的HTML内容(只展示前2000字) ===")
-    logger.info(cleaned_html[:2000] + "..." if len(cleaned_html) > 2000 else cleaned_html)
-    logger.info("=== HTML内容结束 ===\n")
+    # 输出清理后的HTML到日志文件（只在DEBUG级别序列化，避免每个请求都输出整棵树）
+    if logger.isEnabledFor(logging.DEBUG):
+        cleaned_html = html.tostring(body, encoding='unicode')
+        logger.debug("\n=== 清理后的HTML内容(只展示前2000字) ===")
+        logger.debug(cleaned_html[:2000] + "..." if len(cleaned_html) > 2000 else cleaned_html)
+        logger.debug("=== HTML内容结束 ===\n")
     
     return body
 
@@ -267,7 +529,7 @@ def remove_display_none_elements(body):
     removed_count = 0
     
     # 查找所有有 style 属性的元素
-    elements_with_style = body.xpath(".//*[@style]")
+    elements_with_style = _XP_STYLED(body)
     
     elements_to_remove = []
     
@@ -282,7 +544,7 @@ def remove_display_none_elements(body):
                 elements_to_remove.append(element)
                 elem_id = element.get('id', '')
                 elem_class = element.get('class', '')
-                logger.info(f"  标记删除不可见元素: {element.tag} id='{elem_id[:30]}' class='{elem_class[:30]}'")
+                logger.debug(f"  标记删除不可见元素: {element.tag} id='{elem_id[:30]}' class='{elem_class[:30]}'")
     
     # 删除标记的元素
     for element in elements_to_remove:
@@ -296,6 +558,22 @@ def remove_display_none_elements(body):
     
     return removed_count
 
+# 页面级header内容特征词汇
+_PAGE_HEADER_MATCHER = KeywordMatcher([
+    '登录', '注册', '首页', '主页', '无障碍', '办事', 
+    '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府',
+    'login', 'register', 'home', 'menu', 'search', 'nav'
+])
+
+# 强header特征 + 强footer特征
+STRONG_PAGE_INDICATORS = (
+    'header', 'top', 'navbar', 'navigation', 'menu-main', 
+    'site-header', 'page-header', 'banner', 'topbar',
+    'footer', 'bottom', 'site-footer', 'page-footer', 
+    'footerpc', 'wapfooter', 'g-bottom'
+)
+_RE_STRONG_PAGE_INDICATORS = _compile_indicators(STRONG_PAGE_INDICATORS)
+
 def remove_page_level_header_footer(body):
     """
     激进删除页面级的header和footer - 基于多重特征判断
@@ -305,78 +583,46 @@ def remove_page_level_header_footer(body):
     removed_count = 0
     
     # 第一轮：删除明确的语义标签
-    semantic_tags = ["//header", "//footer", "//nav"]
-    for tag_xpath in semantic_tags:
-        elements = body.xpath(tag_xpath)
-        for element in elements:
-            try:
-                parent = element.getparent()
-                if parent is not None:
-                    parent.remove(element)
-                    removed_count += 1
-                    logger.info(f"  删除语义标签: {element.tag}")
-            except Exception as e:
-                logger.info(f"删除语义标签时出错: {e}")
+    elements = _semantic_removal_order(_XP_PAGE_SEMANTIC_TAGS(body), _PAGE_SEMANTIC_RULES)
+    for element in _strip_semantic_elements(body, elements, _PAGE_SEMANTIC_RULES):
+        removed_count += 1
+        logger.debug(f"  删除语义标签: {element.tag}")
     
     # 第二轮：删除具有强header/footer特征的顶级div容器
-    top_divs = body.xpath("./div")  # 只检查body的直接子div
+    top_divs = _XP_CHILD_DIVS(body)  # 只检查body的直接子div
     
     containers_to_remove = []
     
     for div in top_divs:
-        classes = div.get('class', '').lower()
-        elem_id = div.get('id', '').lower()
+        class_id = _class_id_text(div)
         text_content = div.text_content().lower()
         
         is_header_footer = False
         
-        # 强header特征
-        strong_header_indicators = [
-            'header', 'top', 'navbar', 'navigation', 'menu-main', 
-            'site-header', 'page-header', 'banner', 'topbar'
-        ]
-        
-        # 强footer特征
-        strong_footer_indicators = [
-            'footer', 'bottom', 'site-footer', 'page-footer', 
-            'footerpc', 'wapfooter', 'g-bottom'
-        ]
-        
         # 检查类名和ID中的强特征
-        for indicator in strong_header_indicators + strong_footer_indicators:
-            if indicator in classes or indicator in elem_id:
-                is_header_footer = True
-                logger.info(f"  发现强结构特征: {indicator} in class/id")
-                break
+        if _RE_STRONG_PAGE_INDICATORS.search(class_id):
+            is_header_footer = True
+            if logger.isEnabledFor(logging.DEBUG):
+                indicator = next(indicator for indicator in STRONG_PAGE_INDICATORS if indicator in class_id)
+                logger.debug(f"  发现强结构特征: {indicator} in class/id")
         
         # 基于内容的强特征判断（更严格的条件）
         if not is_header_footer:
             # Header内容特征（需要多个条件同时满足）
-            header_words = [
-                '登录', '注册', '首页', '主页', '无障碍', '办事', 
-                '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府',
-                'login', 'register', 'home', 'menu', 'search', 'nav'
-            ]
-            header_count = sum(1 for word in header_words if word in text_content)
+            header_count = _PAGE_HEADER_MATCHER.count(text_content)
             
             # Footer内容特征（需要多个条件同时满足）
-            footer_words =  [
-                '网站说明', '网站标识码', '版权所有', '主办单位', '承办单位', 
-                '技术支持', '联系我们', '网站地图', '隐私政策', '免责声明',
-                '备案号', 'icp', '公安备案', '政府网站', '网站管理',
-                'copyright', 'all rights reserved', 'powered by', 'designed by'
-            ]
-            footer_count = sum(1 for word in footer_words if word in text_content)
+            footer_count = _FOOTER_CONTENT_MATCHER.count(text_content)
             
             text_length = len(text_content.strip())
             
             # 只有当特征词汇非常集中且容器相对较小时才删除
             if header_count >= 4 and text_length < 1000:
                 is_header_footer = True
-                logger.info(f"  发现强header内容特征: {header_count}个关键词")
+                logger.debug(f"  发现强header内容特征: {header_count}个关键词")
             elif footer_count >= 3 and text_length < 800:
                 is_header_footer = True
-                logger.info(f"  发现强footer内容特征: {footer_count}个关键词")
+                logger.debug(f"  发现强footer内容特征: {footer_count}个关键词")
         
         if is_header_footer:
             containers_to_remove.append(div)
@@ -388,34 +634,177 @@ def remove_page_level_header_footer(body):
             if parent is not None:
                 parent.remove(container)
                 removed_count += 1
-                logger.info(f"  删除页面级容器: {container.tag} class='{container.get('class', '')[:30]}'")
+                logger.debug(f"  删除页面级容器: {container.tag} class='{container.get('class', '')[:30]}'")
         except Exception as e:
             logger.error(f"删除页面级容器时出错: {e}")
     
     return removed_count
 
-def calculate_text_density(element):
+class NodeCache:
+    """
+    一次处理过程内缓存元素的 text_content() 和后代标签统计，避免对同一子树反复遍历
+    以元素本身为键（按对象标识哈希），缓存期间元素不会被回收，不能跨越修改树的操作使用
+    """
+    def __init__(self):
+        self._text = {}
+        self._text_lower = {}
+        self._text_length = {}
+        self._census = {}
+        self._link_text = {}
+        self._content = {}
+        self._structure = {}
+        self._list_stats = {}
+
+    def prime(self, root):
+        """
+        一次后序遍历，由子元素的统计累加出 root 子树中每个元素的 census() 和 content_stats()，
+        之后对这些元素的查询不再遍历子树
+        """
+        census = self._census
+        content = self._content
+        for _, element in etree.iterwalk(root, events=('end',)):
+            if not isinstance(element.tag, str):
+                continue
+            tag_count = link_count = image_count = 0
+            href_count = href_text_length = structured_count = 0
+            for child in element:
+                tag = child.tag
+                if not isinstance(tag, str):
+                    continue
+                child_tags, child_links, child_images = census[child]
+                child_hrefs, child_href_text, child_structured = content[child]
+                tag_count += child_tags + 1
+                link_count += child_links
+                image_count += child_images
+                href_count += child_hrefs
+                href_text_length += child_href_text
+                structured_count += child_structured
+                if tag == 'a':
+                    link_count += 1
+                    if child.get('href') is not None:
+                        href_count += 1
+                        href_text_length += len(child.text_content().strip())
+                elif tag == 'img':
+                    image_count += 1
+                if tag in _STRUCTURED_TAGS or (tag == 'div' and 'content' in child.get('class', '')):
+                    structured_count += 1
+            census[element] = (tag_count, link_count, image_count)
+            content[element] = (href_count, href_text_length, structured_count)
+
+    def text(self, element):
+        """等价于 element.text_content()"""
+        text = self._text.get(element)
+        if text is None:
+            text = self._text[element] = element.text_content()
+        return text
+
+    def text_lower(self, element):
+        """等价于 element.text_content().lower()，同一元素只转换一次"""
+        text = self._text_lower.get(element)
+        if text is None:
+            text = self._text_lower[element] = self.text(element).lower()
+        return text
+
+    def text_length(self, element):
+        """等价于 len(element.text_content().strip())，同一元素只计算一次"""
+        length = self._text_length.get(element)
+        if length is None:
+            length = self._text_length[element] = len(self.text(element).strip())
+        return length
+
+    def census(self, element):
+        """返回 (后代标签数, 链接数, 图片数)，与 .//* 、.//a 、.//img 的结果数量一致"""
+        counts = self._census.get(element)
+        if counts is None:
+            counts = self._census[element] = (
+                int(_XP_COUNT_DESCENDANTS(element)),
+                int(_XP_COUNT_LINKS(element)),
+                int(_XP_COUNT_IMGS(element)),
+            )
+        return counts
+
+    def content_stats(self, element):
+        """返回 (a[@href]数量, 这些链接去掉首尾空白后的文本总长度, 结构化元素数量)"""
+        stats = self._content.get(element)
+        if stats is None:
+            links = _XP_HREF_LINKS(element)
+            stats = self._content[element] = (
+                len(links),
+                sum(len(link.text_content().strip()) for link in links),
+                int(_XP_COUNT_STRUCTURED(element)),
+            )
+        return stats
+
+    def structure(self, element):
+        """
+        一次遍历返回 (p数量, h1-h3数量, style含text-align的div数量)，
+        与 .//p 、.//h1 | .//h2 | .//h3 、.//div[contains(@style, 'text-align')] 的结果数量一致
+        """
+        counts = self._structure.get(element)
+        if counts is None:
+            paragraphs = headings = styled_divs = 0
+            for child in element.iterdescendants('p', 'h1', 'h2', 'h3', 'div'):
+                tag = child.tag
+                if tag == 'p':
+                    paragraphs += 1
+                elif tag == 'div':
+                    if 'text-align' in child.get('style', ''):
+                        styled_divs += 1
+                else:
+                    headings += 1
+            counts = self._structure[element] = (paragraphs, headings, styled_divs)
+        return counts
+
+    def list_stats(self, element):
+        """
+        一次遍历返回 (列表项, 图片数量, a[@href]数量)；列表项为 li、tr、article 以及 class 含 item 的 div，
+        与 .//li | .//tr | .//article | .//div[contains(@class, 'item')] 的结果及顺序一致，
+        数量与 .//img 、.//a[@href] 一致
+        """
+        stats = self._list_stats.get(element)
+        if stats is None:
+            items = []
+            images = hrefs = 0
+            for child in element:
+                # 子元素已统计过时（如向上搜索时的上一层容器）只需判断它本身，子树直接复用缓存
+                child_stats = self._list_stats.get(child)
+                for node in (child,) if child_stats is not None else child.iter():
+                    tag = node.tag
+                    if tag in _LIST_ITEM_TAGS or (tag == 'div' and 'item' in node.get('class', '')):
+                        items.append(node)
+                    elif tag == 'img':
+                        images += 1
+                    elif tag == 'a' and node.get('href') is not None:
+                        hrefs += 1
+                if child_stats is not None:
+                    items.extend(child_stats[0])
+                    images += child_stats[1]
+                    hrefs += child_stats[2]
+            stats = self._list_stats[element] = (items, images, hrefs)
+        return stats
+
+    def link_text_length(self, element):
+        """所有链接文本的总长度"""
+        length = self._link_text.get(element)
+        if length is None:
+            length = self._link_text[element] = sum(len(link.text_content()) for link in element.iterdescendants('a'))
+        return length
+
+def calculate_text_density(element, cache=None):
     """
     计算元素的文本密度 - 借鉴trafilatura的密度计算
     密度 = 文本长度 / (标签数量 + 链接数量 * 权重)
     """
-    text_content = element.text_content().strip()
-    text_length = len(text_content)
+    if cache is None:
+        cache = NodeCache()
+    
+    text_length = cache.text_length(element)
     
     if text_length == 0:
         return 0
     
-    # 计算标签数量
-    all_tags = element.xpath(".//*")
-    tag_count = len(all_tags)
-    
-    # 计算链接数量（链接通常在导航中密集出现）
-    links = element.xpath(".//a")
-    link_count = len(links)
-    
-    # 计算图片数量
-    images = element.xpath(".//img")
-    image_count = len(images)
+    # 一次取出标签数量、链接数量（链接通常在导航中密集出现）和图片数量
+    tag_count, link_count, image_count = cache.census(element)
     
     # 密度计算：文本越多、标签越少、链接越少 = 密度越高
     # 链接密集的区域（如导航）会有较低密度
@@ -424,6 +813,12 @@ def calculate_text_density(element):
     
     return density
 
+# 重要内容标识符 - 这些容器通常包含主要内容
+_RE_IMPORTANT_INDICATORS = _compile_indicators([
+    'content', 'main', 'article', 'detail', 'news', 'info',
+    'bg-fff', 'bg-white', 'wrapper', 'body'  # 添加常见的内容容器类名
+])
+
 def remove_low_density_containers(body):
     """
     第一步：移除低密度容器 - 主要针对导航、菜单等链接密集区域
@@ -432,42 +827,30 @@ def remove_low_density_containers(body):
     logger.info("执行第一步：移除低密度容器...")
     
     # 获取所有顶级容器（body的直接子元素）
-    top_level_containers = body.xpath("./div | ./section | ./main | ./article | ./header | ./footer | ./nav | ./aside")
+    top_level_containers = _XP_TOPLEVEL(body)
     
     containers_to_remove = []
+    cache = NodeCache()
     
     for container in top_level_containers:
-        density = calculate_text_density(container)
-        text_length = len(container.text_content().strip())
-        links = container.xpath(".//a")
+        density = calculate_text_density(container, cache)
+        text_length = cache.text_length(container)
+        tag_count, link_count, _ = cache.census(container)
         
         # 检查是否包含重要内容标识符 - 保护这些容器
         classes = container.get('class', '').lower()
-        elem_id = container.get('id', '').lower()
-        
-        # 重要内容标识符 - 这些容器通常包含主要内容
-        important_indicators = [
-            'content', 'main', 'article', 'detail', 'news', 'info',
-            'bg-fff', 'bg-white', 'wrapper', 'body'  # 添加常见的内容容器类名
-        ]
-        
-        has_important_content = any(indicator in classes or indicator in elem_id 
-                                  for indicator in important_indicators)
+        has_important_content = bool(_RE_IMPORTANT_INDICATORS.search(_class_id_text(container)))
         
         # 检查是否包含文章特征（时间、标题等）
-        has_article_features = bool(
-            container.xpath(".//h1 | .//h2 | .//h3") or  # 标题
-            container.xpath(".//*[contains(text(), '发布时间') or contains(text(), '来源') or contains(text(), '浏览次数')]") or  # 文章元信息
-            len(container.xpath(".//p")) > 3  # 多个段落
-        )
+        has_article_features = _XP_HAS_ARTICLE_FEATURES(container)
         
         # 如果包含重要内容或文章特征，跳过删除
         if has_important_content or has_article_features:
-            logger.info(f"  保护重要内容容器: class='{classes[:30]}' (包含重要内容标识或文章特征)")
+            logger.debug(f"  保护重要内容容器: class='{classes[:30]}' (包含重要内容标识或文章特征)")
             continue
         
         # 低密度且链接密集的容器很可能是导航
-        link_ratio = len(links) / max(1, len(container.xpath(".//*")))
+        link_ratio = link_count / max(1, tag_count)
         
         # 判断是否为低质量容器
         is_low_quality = False
@@ -475,19 +858,19 @@ def remove_low_density_containers(body):
         # 条件1：密度极低且链接比例高（典型导航特征）
         if density < 5 and link_ratio > 0.3:
             is_low_quality = True
-            logger.info(f"  发现低密度高链接容器: 密度={density:.2f}, 链接比例={link_ratio:.2f}")
+            logger.debug(f"  发现低密度高链接容器: 密度={density:.2f}, 链接比例={link_ratio:.2f}")
         
         # 条件2：文本很少但标签很多（可能是复杂的导航结构）
-        elif text_length < 200 and len(container.xpath(".//*")) > 20:
+        elif text_length < 200 and tag_count > 20:
             is_low_quality = True
-            logger.info(f"  发现少文本多标签容器: 文本长度={text_length}, 标签数={len(container.xpath('.//*'))}")
+            logger.debug(f"  发现少文本多标签容器: 文本长度={text_length}, 标签数={tag_count}")
         
         # 条件3：链接文本占总文本比例过高（但文本长度要足够少，避免误删内容页）
-        elif links and text_length < 500:  # 增加文本长度限制
-            link_text_length = sum(len(link.text_content()) for link in links)
+        elif link_count and text_length < 500:  # 增加文本长度限制
+            link_text_length = cache.link_text_length(container)
             if text_length > 0 and link_text_length / text_length > 0.8:  # 提高阈值
                 is_low_quality = True
-                logger.info(f"  发现链接文本占比过高容器: 链接文本比例={link_text_length/text_length:.2f}")
+                logger.debug(f"  发现链接文本占比过高容器: 链接文本比例={link_text_length/text_length:.2f}")
         
         if is_low_quality:
             containers_to_remove.append(container)
@@ -513,24 +896,11 @@ def remove_semantic_interference_tags(body):
     logger.info("执行第二步：移除语义干扰标签...")
     
     # 强制移除的语义标签
-    semantic_tags_to_remove = [
-        "//header", "//footer", "//nav", "//aside",
-        "//div[@role='navigation']", "//div[@role='banner']", "//div[@role='contentinfo']",
-        "//section[@role='navigation']"
-    ]
-    
     removed_count = 0
-    for xpath in semantic_tags_to_remove:
-        elements = body.xpath(xpath)
-        for element in elements:
-            try:
-                parent = element.getparent()
-                if parent is not None:
-                    parent.remove(element)
-                    removed_count += 1
-                    logger.info(f"  移除语义标签: {element.tag} {element.get('class', '')[:30]}")
-            except Exception as e:
-                logger.info(f"删除语义标签时出错: {e}")
+    elements = _semantic_removal_order(_XP_SEMANTIC_INTERFERENCE(body), _SEMANTIC_INTERFERENCE_RULES)
+    for element in _strip_semantic_elements(body, elements, _SEMANTIC_INTERFERENCE_RULES):
+        removed_count += 1
+        logger.debug(f"  移除语义标签: {element.tag} {element.get('class', '')[:30]}")
     
     logger.info(f"第二步完成：移除了 {removed_count} 个语义干扰标签")
     return body
@@ -542,13 +912,14 @@ def remove_positional_interference(body):
     logger.info("执行第四步：移除位置干扰容器...")
     
     # 获取body的所有直接子容器
-    direct_children = body.xpath("./div | ./section | ./main | ./article")
+    direct_children = _XP_DIRECT_CONTENT_CHILDREN(body)
     
     if len(direct_children) <= 2:
         logger.info("容器数量太少，跳过位置清理")
         return body
     
     containers_to_remove = []
+    cache = NodeCache()
     
     # 分析第一个和最后一个容器
     first_container = direct_children[0] if direct_children else None
@@ -556,15 +927,15 @@ def remove_positional_interference(body):
     
     # 检查第一个容器是否为头部干扰
     if first_container is not None:
-        if is_positional_header(first_container):
+        if is_positional_header(first_container, cache):
             containers_to_remove.append(first_container)
-            logger.info(f"  标记移除头部容器: {first_container.tag}")
+            logger.debug(f"  标记移除头部容器: {first_container.tag}")
     
     # 检查最后一个容器是否为尾部干扰
     if last_container is not None and last_container != first_container:
-        if is_positional_footer(last_container):
+        if is_positional_footer(last_container, cache):
             containers_to_remove.append(last_container)
-            logger.info(f"  标记移除尾部容器: {last_container.tag}")
+            logger.debug(f"  标记移除尾部容器: {last_container.tag}")
     
     # 删除位置干扰容器
     removed_count = 0
@@ -580,72 +951,90 @@ def remove_positional_interference(body):
     logger.info(f"第四步完成：移除了 {removed_count} 个位置干扰容器")
     return body
 
-def is_positional_header(container):
+# 头部特征词汇
+_POSITIONAL_HEADER_MATCHER = KeywordMatcher([
+    '登录', '注册', '首页', '主页', '导航', '菜单', '搜索',
+    '政务服务', '办事服务', '互动交流', '走进', '无障碍',
+    'login', 'register', 'home', 'menu', 'search', 'nav'
+])
+
+# 尾部特征词汇
+_POSITIONAL_FOOTER_MATCHER = KeywordMatcher([
+    '版权所有', '主办单位', '承办单位', '技术支持', '联系我们',
+    '网站地图', '隐私政策', '免责声明', '备案号', 'icp',
+    '网站标识码', '政府网站', '网站管理',
+    'copyright', 'all rights reserved', 'powered by'
+])
+
+def is_positional_header(container, cache=None):
     """判断容器是否为位置上的头部干扰"""
-    text_content = container.text_content().lower()
-    
-    # 头部特征词汇
-    header_indicators = [
-        '登录', '注册', '首页', '主页', '导航', '菜单', '搜索',
-        '政务服务', '办事服务', '互动交流', '走进', '无障碍',
-        'login', 'register', 'home', 'menu', 'search', 'nav'
-    ]
+    if cache is None:
+        cache = NodeCache()
+    text_content = cache.text_lower(container)
     
     # 计算头部特征词汇出现次数
-    header_count = sum(1 for word in header_indicators if word in text_content)
+    header_count = _POSITIONAL_HEADER_MATCHER.count(text_content)
     
     # 计算文本密度
-    density = calculate_text_density(container)
+    density = calculate_text_density(container, cache)
     
     # 判断条件：包含多个头部词汇 或 密度很低且包含头部词汇
     return header_count >= 3 or (density < 8 and header_count >= 2)
 
-def is_positional_footer(container):
+def is_positional_footer(container, cache=None):
     """判断容器是否为位置上的尾部干扰"""
-    text_content = container.text_content().lower()
-    
-    # 尾部特征词汇
-    footer_indicators = [
-        '版权所有', '主办单位', '承办单位', '技术支持', '联系我们',
-        '网站地图', '隐私政策', '免责声明', '备案号', 'icp',
-        '网站标识码', '政府网站', '网站管理',
-        'copyright', 'all rights reserved', 'powered by'
-    ]
+    if cache is None:
+        cache = NodeCache()
+    text_content = cache.text_lower(container)
     
     # 计算尾部特征词汇出现次数
-    footer_count = sum(1 for word in footer_indicators if word in text_content)
+    footer_count = _POSITIONAL_FOOTER_MATCHER.count(text_content)
     
     # 计算文本密度
-    density = calculate_text_density(container)
+    density = calculate_text_density(container, cache)
     
     # 判断条件：包含多个尾部词汇 或 密度很低且包含尾部词汇
     return footer_count >= 2 or (density < 6 and footer_count >= 1)
 
-def is_interference_container(container):
+# 干扰容器的内容特征词汇
+_INTERFERENCE_HEADER_MATCHER = KeywordMatcher([
+    '登录', '注册', '首页', '主页', '无障碍', '政务服务', '办事服务',
+    '互动交流', '走进', '移动版', '手机版', '导航', '菜单', '搜索',
+    'login', 'register', 'home', 'menu', 'search', 'nav'
+])
+_INTERFERENCE_FOOTER_MATCHER = KeywordMatcher([
+    '网站说明', '网站标识码', '版权所有', '主办单位', '承办单位',
+    '技术支持', '联系我们', '网站地图', '隐私政策', '免责声明',
+    '备案号', 'icp', '公安备案', '政府网站', '网站管理',
+    'copyright', 'all rights reserved', 'powered by'
+])
+# 强制删除的结构特征关键词
+_RE_STRONG_INTERFERENCE = _compile_indicators([
+    'header', 'footer', 'nav', 'navigation', 'menu', 'menubar', 
+    'topbar', 'bottom', 'sidebar', 'aside', 'banner', 'breadcrumb'
+])
+# 广告和社交媒体相关
+_AD_MATCHER = KeywordMatcher(['advertisement', 'ads', 'social', 'share', 'follow', 'subscribe'])
+
+def is_interference_container(container, cache=None):
     """
     判断是否为需要删除的干扰容器 - 融合trafilatura的多维度判断
     """
+    if cache is None:
+        cache = NodeCache()
     classes = container.get('class', '').lower()
-    elem_id = container.get('id', '').lower()
-    tag_name = container.tag.lower()
-    text_content = container.text_content().lower()
+    text_content = cache.text_lower(container)
     
     # 1. 强制删除的语义标签 - trafilatura的结构特征
-    if tag_name in ['header', 'footer', 'nav', 'aside']:
+    if container.tag in _INTERFERENCE_TAGS:
         return True
     
     # 2. 强制删除的结构特征关键词
-    strong_interference_keywords = [
-        'header', 'footer', 'nav', 'navigation', 'menu', 'menubar', 
-        'topbar', 'bottom', 'sidebar', 'aside', 'banner', 'breadcrumb'
-    ]
-    
-    for keyword in strong_interference_keywords:
-        if keyword in classes or keyword in elem_id:
-            return True
+    if _RE_STRONG_INTERFERENCE.search(_class_id_text(container)):
+        return True
     
     # 3. 基于内容密度的判断 - trafilatura的密度分析
-    density = calculate_text_density(container)
+    density = calculate_text_density(container, cache)
     text_length = len(text_content.strip())
     
     # 低密度 + 短文本 = 很可能是导航或装饰性元素
@@ -653,9 +1042,9 @@ def is_interference_container(container):
         return True
     
     # 4. 基于链接密度的判断 - trafilatura会分析链接分布
-    links = container.xpath(".//a")
-    if len(links) > 5:
-        link_text_length = sum(len(link.text_content()) for link in links)
+    _, link_count, _ = cache.census(container)
+    if link_count > 5:
+        link_text_length = cache.link_text_length(container)
         if text_length > 0:
             link_ratio = link_text_length / text_length
             # 链接文本占比过高，很可能是导航
@@ -663,22 +1052,9 @@ def is_interference_container(container):
                 return True
     
     # 5. 基于内容特征的精确判断
-    header_content_patterns = [
-        '登录', '注册', '首页', '主页', '无障碍', '政务服务', '办事服务',
-        '互动交流', '走进', '移动版', '手机版', '导航', '菜单', '搜索',
-        'login', 'register', 'home', 'menu', 'search', 'nav'
-    ]
-    
-    footer_content_patterns = [
-        '网站说明', '网站标识码', '版权所有', '主办单位', '承办单位',
-        '技术支持', '联系我们', '网站地图', '隐私政策', '免责声明',
-        '备案号', 'icp', '公安备案', '政府网站', '网站管理',
-        'copyright', 'all rights reserved', 'powered by'
-    ]
-    
     # 计算内容特征匹配度
-    header_matches = sum(1 for pattern in header_content_patterns if pattern in text_content)
-    footer_matches = sum(1 for pattern in footer_content_patterns if pattern in text_content)
+    header_matches = _INTERFERENCE_HEADER_MATCHER.count(text_content)
+    footer_matches = _INTERFERENCE_FOOTER_MATCHER.count(text_content)
     
     # 降低阈值，更严格地识别干扰内容
     if header_matches >= 2:  # 从3降到2
@@ -693,8 +1069,7 @@ def is_interference_container(container):
         return True
     
     # 7. 特殊情况：广告和社交媒体相关
-    ad_keywords = ['advertisement', 'ads', 'social', 'share', 'follow', 'subscribe']
-    ad_matches = sum(1 for keyword in ad_keywords if keyword in text_content or keyword in classes)
+    ad_matches = _AD_MATCHER.count(text_content, classes)
     if ad_matches >= 2:
         return True
     
@@ -723,7 +1098,7 @@ def extract_content_to_markdown(html_content: str):
     """
     try:
         # 解析HTML
-        tree = html.fromstring(html_content)
+        tree = html.fromstring(html_content, parser=get_html_parser())
         
         # 获取主内容容器
         main_container = find_article_container(tree)
@@ -738,9 +1113,8 @@ def extract_content_to_markdown(html_content: str):
         # 生成XPath
         xpath = generate_xpath(main_container)
         
-        # 获取容器的HTML内容
-        container_html = html.tostring(main_container, encoding='unicode', pretty_print=True)
-        cleaned_container_html = clean_container_html(container_html)
+        # 获取清理后的容器HTML：在容器的副本上清理后只序列化一次
+        cleaned_container_html = clean_container_html(main_container)
         # 转换为Markdown
         markdown_content = markdownify.markdownify(
             cleaned_container_html,
@@ -773,82 +1147,124 @@ def extract_content_to_markdown(html_content: str):
             'status': 'failed'
         }
 
-def clean_container_html(container_html: str) -> str:
+# clean_container_html 用的查询
+_XP_DROP_CANDIDATES = etree.XPath("descendant-or-self::*[self::script or self::style or @style]")
+_XP_EVENT_ATTRIBUTES = etree.XPath("descendant-or-self::*/@*[starts-with(name(), 'on')]")
+_XP_JAVASCRIPT_HREFS = etree.XPath("descendant-or-self::*[starts-with(@href, 'javascript:')]")
+
+# 每个线程复用一个解析器（lxml的解析器不能跨线程共享）
+_parser_local = threading.local()
+
+def get_html_parser():
     """
-    清理html内容，删除script、style和js代码
+    返回当前线程的HTML解析器；代码里只按属性匹配id，不需要libxml2建立id索引
+    注释要保留：注释会切分文本节点、影响子元素数量和序列化的空白，删掉会改变提取结果
     """
-    from bs4 import BeautifulSoup
-    import re
+    parser = getattr(_parser_local, 'parser', None)
+    if parser is None:
+        parser = _parser_local.parser = html.HTMLParser(collect_ids=False)
+    return parser
 
-    if not container_html or not isinstance(container_html, str):
-        return container_html or ""
+# 提取结果缓存：按输入内容的摘要保存最近的结果，只在调用方显式开启时使用
+EXTRACT_CACHE_SIZE = 128
+_extract_cache = OrderedDict()
+_extract_cache_lock = threading.Lock()
+
+def extract_content_to_markdown_cached(html_content: str):
+    """
+    带LRU缓存的 extract_content_to_markdown，相同的HTML直接返回上次的结果
+    """
+    key = hashlib.blake2b(html_content.encode('utf-8'), digest_size=16).digest()
+    with _extract_cache_lock:
+        result = _extract_cache.get(key)
+        if result is not None:
+            _extract_cache.move_to_end(key)
+            logger.info("命中提取结果缓存")
+            return dict(result)
+    
+    result = extract_content_to_markdown(html_content)
+    
+    with _extract_cache_lock:
+        _extract_cache[key] = dict(result)
+        _extract_cache.move_to_end(key)
+        while len(_extract_cache) > EXTRACT_CACHE_SIZE:
+            _extract_cache.popitem(last=False)
+    return result
+
+def clean_container_html(container) -> str:
+    """
+    清理容器内容并序列化为HTML，删除script、style和js代码
+    在容器的副本上清理，只序列化一次，不修改传入的树，也不再把HTML字符串重新解析一遍；清理出错时返回未清理的HTML
+    """
+    if container is None:
+        return ""
 
     try:
-        # 解析HTML
-        soup = BeautifulSoup(container_html, 'html.parser')
-        
-        # 删除script标签
-        for script in soup.find_all('script'):
-            if script:  # 确保不是None
-                script.decompose()
-        
-        # 删除style标签
-        for style in soup.find_all('style'):
-            if style:  # 确保不是None
-                style.decompose()
-
-        # 1. 查找所有有style属性的元素
-        styled_elements = soup.find_all(attrs={"style": True})
-        
-        display_none_elements = []
-        for i, element in enumerate(styled_elements):
-            style = element.get('style', '')
-            if 'display' in style.lower() and 'none' in style.lower():
-                display_none_elements.append(element)
-                        
-        # 尝试删除它们
-        for element in display_none_elements:
-            try:
-                element.decompose()
-            except Exception as e:
-                pass
-        result = str(soup)
-        
-        # 检查结果中是否还有display:none
-        if 'display:none' in result.lower():
-            # 找出残留的
-            remaining = re.findall(r'<[^>]*display\s*:\s*none[^>]*>', result, re.IGNORECASE)
-
-        # 安全地删除JavaScript相关属性
-        all_tags = soup.find_all()
-        for tag in all_tags:
-            if tag is None or not hasattr(tag, 'attrs'):
-                continue
-                
-            attrs_to_remove = []
-            # 安全地遍历属性
-            for attr_name in list(tag.attrs.keys()):  # 使用list避免在迭代中修改
-                if attr_name.startswith('on'):  # onclick, onload等
-                    attrs_to_remove.append(attr_name)
-                elif (attr_name == 'href' and 
-                      tag.get(attr_name) and 
-                      str(tag[attr_name]).startswith('javascript:')):
-                    attrs_to_remove.append(attr_name)
-            
-            # 安全删除属性
-            for attr in attrs_to_remove:
-                try:
-                    del tag[attr]
-                except (AttributeError, KeyError):
-                    pass  # 属性可能已被删除
-        
-        # 返回清理后的HTML
-        return str(soup)
-        
+        cleaned = copy.deepcopy(container)
+        removed_count = strip_container_scripts(cleaned)
+        if removed_count:
+            logger.debug(f"清理容器: 删除了 {removed_count} 个script、style或隐藏元素")
+        container_html = html.tostring(cleaned, encoding='unicode', pretty_print=True)
+        # 去掉占位标签，被删除元素前后的换行保持与删除前一致
+        return container_html.replace(_INLINE_PLACEHOLDER, '').replace(_BLOCK_PLACEHOLDER, '')
     except Exception as e:
-        # 如果发生错误，返回原始内容或空字符串
+        # 如果发生错误，返回未清理的内容
         print(f"清理HTML时出错: {e}")
-        return container_html
+        return html.tostring(container, encoding='unicode', pretty_print=True)
+
+# 被删除元素留在原处的空占位标签。script和style都会被删除，序列化结果中空的script、style标签只可能是占位标签；
+# libxml2的pretty_print在块级元素（如style）后换行，在行内元素（如script）后不换行
+_INLINE_PLACEHOLDER = '<script></script>'
+_BLOCK_PLACEHOLDER = '<style></style>'
+
+@functools.lru_cache(maxsize=None)
+def _breaks_line_after(tag) -> bool:
+    """libxml2的pretty_print是否会在该标签的元素后面换行；未知标签和行内标签不换行"""
+    probe = etree.Element('div')
+    try:
+        etree.SubElement(probe, tag)
+    except ValueError:
+        return False
+    etree.SubElement(probe, 'b')
+    return '\n<b>' in html.tostring(probe, encoding='unicode', pretty_print=True)
+
+def strip_container_scripts(container) -> int:
+    """
+    在 container 所在的树上删除 container 及其后代中的script、style标签、display:none 的元素以及JavaScript相关属性，返回删除的元素个数
+    被删除的元素清空后换成同样是否换行的空script或style占位标签（保留其后的文本），
+    序列化后再去掉占位标签，pretty_print 在其前后插入的换行与删除前一致；调用方应传入树的副本
+    """
+    # 收集script、style标签和 display:none 的元素
+    elements_to_drop = []
+    for element in _XP_DROP_CANDIDATES(container):
+        if element.tag in ('script', 'style'):
+            elements_to_drop.append(element)
+            continue
+        style = element.get('style')
+        if style and 'display' in style.lower() and 'none' in style.lower():
+            elements_to_drop.append(element)
+
+    removed_count = 0
+    for element in elements_to_drop:
+        # 祖先已被清空的元素已经不在树中
+        if element is not container and element.getparent() is None:
+            continue
+        placeholder = 'style' if _breaks_line_after(element.tag) else 'script'
+        element.clear(keep_tail=True)
+        element.tag = placeholder
+        removed_count += 1
+
+    # 删除JavaScript相关属性：onclick、onload等事件交给 strip_attributes 批量删除，再删 javascript: 链接
+    event_attributes = {value.attrname for value in _XP_EVENT_ATTRIBUTES(container)}
+    if event_attributes:
+        etree.strip_attributes(container, *event_attributes)
+    for element in _XP_JAVASCRIPT_HREFS(container):
+        del element.attrib['href']
+
+    return removed_count
+
+_RE_BLANK_LINES = re.compile(r'\n\s*\n\s*\n')
+
 def clean_markdown_content(markdown_content: str) -> str:
     """
     清理Markdown内容
@@ -860,31 +1276,31 @@ def clean_markdown_content(markdown_content: str) -> str:
         str: 清理后的Markdown内容
     """
     # 移除多余的空行
-    markdown_content = re.sub(r'\n\s*\n\s*\n', '\n\n', markdown_content)
-    
-    # 移除行首行尾的空白字符
-    lines = [line.strip() for line in markdown_content.split('\n')]
+    markdown_content = _RE_BLANK_LINES.sub('\n\n', markdown_content)
     
-    # 过滤空行，但保留段落间的分隔
+    # 一次遍历：移除行首行尾的空白字符，过滤空行但保留段落间的分隔
+    # prev_empty 初始为True，开头的空行直接丢弃
     cleaned_lines = []
-    prev_empty = False
+    prev_empty = True
     
-    for line in lines:
-        if line.strip():
+    for line in markdown_content.split('\n'):
+        line = line.strip()
+        if line:
             cleaned_lines.append(line)
             prev_empty = False
         elif not prev_empty:
             cleaned_lines.append('')
             prev_empty = True
     
-    # 移除开头和结尾的空行
-    while cleaned_lines and not cleaned_lines[0]:
-        cleaned_lines.pop(0)
-    while cleaned_lines and not cleaned_lines[-1]:
+    # 移除结尾的空行（最多一个）
+    if cleaned_lines and not cleaned_lines[-1]:
         cleaned_lines.pop()
     
     return '\n'.join(cleaned_lines)
 
+# 最终安全检查用的class/id干扰关键词
+_FINAL_INTERFERENCE_KEYWORDS = ('header', 'footer', 'nav', 'navigation', 'menu', 'sidebar')
+
 def find_main_content_in_cleaned_html(cleaned_body):
     """在清理后的HTML中查找主内容区域"""
     
@@ -893,12 +1309,21 @@ def find_main_content_in_cleaned_html(cleaned_body):
         return None
     
     # 获取所有可能的内容容器
-    content_containers = cleaned_body.xpath(".//div | .//section | .//article | .//main")
+    content_containers = _XP_CONTENT_CONTAINERS(cleaned_body)
     
     if not content_containers:
         logger.info("未找到内容容器，返回body")
         return cleaned_body
     
+    # 一次遍历统计所有容器的子树指标，评分时不再对每个容器单独查询
+    cache = NodeCache()
+    cache.prime(cleaned_body)
+    
+    # printContent 只查一次：其所有祖先即“包含 printContent 子元素”的容器
+    print_content_ancestors = {
+        ancestor for element in _XP_PRINT_CONTENT(cleaned_body) for ancestor in element.iterancestors()
+    }
+    
     # 对容器进行评分，同时删除大幅度减分的标签
     scored_containers = []
     containers_to_remove = []
@@ -908,7 +1333,7 @@ def find_main_content_in_cleaned_html(cleaned_body):
             logger.warning("跳过None容器")
             continue
             
-        score = calculate_content_container_score(container)
+        score = calculate_content_container_score(container, cache)
         
         # 强保护：检查是否包含 printContent 或其他重要内容
         classes = container.get('class', '').lower()
@@ -916,18 +1341,18 @@ def find_main_content_in_cleaned_html(cleaned_body):
         
         # 绝对保护的条件
         is_protected = (
-            'printcontent' in elem_id.lower() or  # printContent ID
-            container.xpath(".//*[@id='printContent' or @id='printcontent']") or  # 包含 printContent 子元素
+            'printcontent' in elem_id or  # printContent ID
+            container in print_content_ancestors or  # 包含 printContent 子元素
             'bg-fff' in classes or  # 常见的内容容器类名
-            'container' in classes and len(container.xpath(".//*")) > 20  # 大型容器且子元素多
+            'container' in classes and cache.census(container)[0] > 20  # 大型容器且子元素多
         )
         
         if is_protected:
             scored_containers.append((container, max(score, 50)))  # 保护的容器至少给50分
-            logger.info(f"保护重要容器: {container.tag} class='{classes[:30]}' 原分数: {score} -> 保护分数: {max(score, 50)}")
+            logger.debug(f"保护重要容器: {container.tag} class='{classes[:30]}' 原分数: {score} -> 保护分数: {max(score, 50)}")
         elif score < -100:
             containers_to_remove.append(container)
-            logger.info(f"标记删除大幅减分容器: {container.tag} class='{container.get('class', '')[:30]}' 得分: {score}")
+            logger.debug(f"标记删除大幅减分容器: {container.tag} class='{container.get('class', '')[:30]}' 得分: {score}")
         elif score > -50:  # 只考虑分数不太低的容器
             scored_containers.append((container, score))
     
@@ -950,8 +1375,8 @@ def find_main_content_in_cleaned_html(cleaned_body):
     for idx, (container, score) in enumerate(top_5, 1):
         classes = container.get('class', '')
         elem_id = container.get('id', '')
-        text_length = len(container.text_content().strip())
-        child_count = len(container.xpath(".//*"))
+        text_length = cache.text_length(container)
+        child_count = cache.census(container)[0]
         
         logger.info(f"\n🏆 排名 #{idx} - 得分: {score}")
         logger.info(f"   标签: {container.tag}")
@@ -983,7 +1408,7 @@ def find_main_content_in_cleaned_html(cleaned_body):
     long_content_containers = []
     
     for container, score in top_5_containers:
-        text_length = len(container.text_content().strip())
+        text_length = cache.text_length(container)
         classes = container.get('class', '')
         elem_id = container.get('id', '')
         
@@ -1007,13 +1432,13 @@ def find_main_content_in_cleaned_html(cleaned_body):
             logger.info("   ✓ 分数差距较小，优先选择更精确的容器")
             
             # 按子元素数量排序（子元素少的更精确）
-            long_content_containers.sort(key=lambda x: len(x[0].xpath(".//*")))
+            long_content_containers.sort(key=lambda x: cache.census(x[0])[0])
             
             # 选择子元素最少但内容足够长的容器
             selected_precise_container = None
             selected_text_length = 0  # 记录选中容器的文本长度
             for container, score, text_length in long_content_containers:
-                child_count = len(container.xpath(".//*"))
+                child_count = cache.census(container)[0]
                 classes = container.get('class', '')
                 elem_id = container.get('id', '')
                 
@@ -1040,11 +1465,8 @@ def find_main_content_in_cleaned_html(cleaned_body):
                     depth = 0
                     max_depth = 5  # 最多向上查找5层
                     
-                    # 有意义的容器标签
-                    meaningful_tags = ['div','section', 'article', 'main']
-                    
                     while current is not None and depth < max_depth:
-                        tag = current.tag.lower()
+                        tag = current.tag
                         classes = current.get('class', '').strip()
                         elem_id = current.get('id', '').strip()
                         
@@ -1056,7 +1478,7 @@ def find_main_content_in_cleaned_html(cleaned_body):
                             break
                         
                         # 检查是否是有意义的容器
-                        is_meaningful_tag = tag in meaningful_tags
+                        is_meaningful_tag = tag in _MEANINGFUL_PARENT_TAGS
                         has_identifier = bool(classes or elem_id)
                         
                         if is_meaningful_tag and has_identifier:
@@ -1079,8 +1501,8 @@ def find_main_content_in_cleaned_html(cleaned_body):
                     # 检查父容器是否合理
                     parent_classes = parent_container.get('class', '')
                     parent_id = parent_container.get('id', '')
-                    parent_text_length = len(parent_container.text_content().strip())
-                    parent_child_count = len(parent_container.xpath(".//*"))
+                    parent_text_length = cache.text_length(parent_container)
+                    parent_child_count = cache.census(parent_container)[0]
                     
                     logger.info(f"   📦 找到的父容器（向上{parent_depth}层）:")
                     logger.info(f"      标签={parent_container.tag}, class='{parent_classes}', id='{parent_id}'")
@@ -1125,7 +1547,8 @@ def find_main_content_in_cleaned_html(cleaned_body):
         if len(similar_score_containers) > 1:
             best_container = select_best_container_prefer_child(
                 [c for c, s in similar_score_containers], 
-                scored_containers
+                scored_containers,
+                cache
             )
         else:
             best_container = scored_containers[0][0]
@@ -1137,9 +1560,7 @@ def find_main_content_in_cleaned_html(cleaned_body):
         elem_id = container.get('id', '').lower()
         combined = f"{classes} {elem_id}"
         
-        interference_keywords = ['header', 'footer', 'nav', 'navigation', 'menu', 'sidebar']
-        
-        for keyword in interference_keywords:
+        for keyword in _FINAL_INTERFERENCE_KEYWORDS:
             if keyword in combined:
                 return True, keyword
         return False, None
@@ -1162,16 +1583,17 @@ def find_main_content_in_cleaned_html(cleaned_body):
             logger.info(f"   ⚠️ 未找到合适的替代容器，保持原选择（但可能不准确）")
     
     # 获取最终选择的容器分数（如果是父容器，可能不在原始列表中）
-    try:
-        final_score = next(score for container, score in scored_containers if container == best_container)
-    except StopIteration:
+    score_map = dict(scored_containers)
+    if best_container in score_map:
+        final_score = score_map[best_container]
+    else:
         # 如果best_container不在scored_containers中（比如选择了父容器），重新计算分数
         logger.info("   ℹ 最终容器不在原始评分列表中，重新计算分数...")
-        final_score = calculate_content_container_score(best_container)
+        final_score = calculate_content_container_score(best_container, cache)
         logger.info(f"   重新计算的得分: {final_score}")
     
-    final_text_length = len(best_container.text_content().strip())
-    final_child_count = len(best_container.xpath(".//*"))
+    final_text_length = cache.text_length(best_container)
+    final_child_count = cache.census(best_container)[0]
     
     logger.info("\n" + "="*80)
     logger.info("🎯 最终选择结果:")
@@ -1193,22 +1615,40 @@ def is_child_of(child_element, parent_element):
         current = current.getparent()
     return False
 
-def select_best_container_prefer_child(similar_containers, all_scored_containers):
+def select_best_container_prefer_child(similar_containers, all_scored_containers, cache=None):
     """从分数相近的容器中选择最佳的，优先选择子节点"""
+    # 只有一个容器时不存在父子关系，结果就是它本身
+    if len(similar_containers) == 1:
+        return similar_containers[0]
+    if cache is None:
+        cache = NodeCache()
+    # 按容器查分数，不再每次线性扫描评分列表
+    score_map = dict(all_scored_containers)
     
-    # 检查容器之间的父子关系
-    parent_child_pairs = []
+    # 检查容器之间的父子关系：每个容器的祖先只向上遍历一次，两两比较时只查集合
+    ancestors = {container: set(container.iterancestors()) for container in similar_containers}
     
+    # 每对容器只比较一次，两个方向各查一次集合；记录 (父序号, 子序号)
+    pair_indexes = []
     for i, container1 in enumerate(similar_containers):
-        for j, container2 in enumerate(similar_containers):
-            if i != j:
-                # 检查container2是否是container1的子节点
-                if is_child_of(container2, container1):
-                    # 获取两个容器的分数
-                    score1 = next(score for c, score in all_scored_containers if c == container1)
-                    score2 = next(score for c, score in all_scored_containers if c == container2)
-                    parent_child_pairs.append((container1, container2, score1, score2))
-                    logger.info(f"发现父子关系: 父容器得分{score1}, 子容器得分{score2}")
+        for j in range(i + 1, len(similar_containers)):
+            container2 = similar_containers[j]
+            if container1 in ancestors[container2]:
+                pair_indexes.append((i, j))
+            elif container2 in ancestors[container1]:
+                pair_indexes.append((j, i))
+    # 按序号排序，保持逐个 (父, 子) 检查时的顺序
+    pair_indexes.sort()
+    
+    parent_child_pairs = []
+    for i, j in pair_indexes:
+        container1 = similar_containers[i]
+        container2 = similar_containers[j]
+        # 获取两个容器的分数
+        score1 = score_map[container1]
+        score2 = score_map[container2]
+        parent_child_pairs.append((container1, container2, score1, score2))
+        logger.info(f"发现父子关系: 父容器得分{score1}, 子容器得分{score2}")
     
     # 如果找到父子关系，需要更严格的判断
     if parent_child_pairs:
@@ -1221,20 +1661,18 @@ def select_best_container_prefer_child(similar_containers, all_scored_containers
                 valid_children.append((child, child_score, score_diff))
         
         if valid_children:
-            # 按分数排序，选择分数最高的子节点
-            valid_children.sort(key=lambda x: (-x[1], x[2]))  # 按子节点分数降序，分差升序
-            
-            best_child, best_score, score_diff = valid_children[0]
+            # 选择分数最高的子节点：按子节点分数降序、分差升序取第一个，并列时保持原顺序
+            best_child, best_score, score_diff = min(valid_children, key=lambda x: (-x[1], x[2]))
             
             # 额外检查：确保选择的子节点确实比父节点更精确
             # 检查子节点的内容密度是否更高
-            child_text_length = len(best_child.text_content().strip())
+            child_text_length = cache.text_length(best_child)
             parent_candidates = [parent for parent, child, p_score, c_score in parent_child_pairs 
                                if child == best_child]
             
             if parent_candidates:
                 parent = parent_candidates[0]
-                parent_text_length = len(parent.text_content().strip())
+                parent_text_length = cache.text_length(parent)
                 
                 # 如果子节点的内容长度不到父节点的60%，可能选择了错误的子节点
                 if child_text_length < parent_text_length * 0.6:
@@ -1256,97 +1694,136 @@ def select_deepest_container_from_similar(similar_containers):
     
     # 计算每个容器的层级深度
     container_depths = []
+    depth_cache = {}
     for container in similar_containers:
-        depth = calculate_container_depth(container)
+        depth = calculate_container_depth(container, depth_cache)
         container_depths.append((container, depth))
         logger.info(f"  候选容器层级深度: {depth} - {container.tag} class='{container.get('class', '')}'")
     
-    # 按层级深度排序（深度越大，层级越深）
-    container_depths.sort(key=lambda x: x[1], reverse=True)
-    
-    # 选择层级最深的容器
-    deepest_container = container_depths[0][0]
-    deepest_depth = container_depths[0][1]
+    # 选择层级最深的容器（深度越大，层级越深；深度相同时取先出现的）
+    deepest_container, deepest_depth = max(container_depths, key=lambda x: x[1])
     
     logger.info(f"选择最深层容器 (深度 {deepest_depth}): {deepest_container.tag} class='{deepest_container.get('class', '')}'")
     return deepest_container
 
-def calculate_container_depth(container):
-    """计算容器距离body的层级深度"""
+def calculate_container_depth(container, depth_cache=None):
+    """
+    计算容器距离body的层级深度
+    depth_cache 为字典时记录路径上每个元素的深度，候选容器共享祖先时不再重复向上遍历
+    """
     depth = 0
+    path = []
     current = container
     
-    # 向上遍历直到body或html
-    while current is not None and current.tag not in ['body', 'html']:
-        depth += 1
-        current = current.getparent()
-        if current is None:
+    # 向上遍历直到body或html，遇到已算过深度的祖先就停止
+    while current is not None and current.tag not in _ROOT_TAGS:
+        if depth_cache is not None and current in depth_cache:
+            depth = depth_cache[current]
             break
+        path.append(current)
+        current = current.getparent()
+    
+    for element in reversed(path):
+        depth += 1
+        if depth_cache is not None:
+            depth_cache[element] = depth
     
     return depth
 def select_best_from_same_score_containers(containers):
     """从得分相同的多个容器中选择层级最深的一个（儿子容器）"""
     # 检查容器之间的层级关系，选择层级最深的
     container_depths = []
+    depth_cache = {}
     
     for container in containers:
         # 计算容器的层级深度（距离body的层级数）
-        depth = calculate_container_depth(container)
+        depth = calculate_container_depth(container, depth_cache)
         container_depths.append((container, depth))
         
         logger.info(f"容器层级深度: {depth} - {container.tag} class='{container.get('class', '')[:30]}'")
     
-    # 按层级深度排序（深度越大，层级越深）
-    container_depths.sort(key=lambda x: x[1], reverse=True)
-    
-    # 选择层级最深的容器（儿子容器）
-    best_container = container_depths[0][0]
-    best_depth = container_depths[0][1]
+    # 选择层级最深的容器（儿子容器；深度相同时取先出现的）
+    best_container, best_depth = max(container_depths, key=lambda x: x[1])
     
     logger.info(f"选择层级最深的容器 (深度 {best_depth}): {best_container.tag} class='{best_container.get('class', '')[:30]}'")
     
     return best_container
 
-def calculate_container_depth(container):
-    """计算容器距离body的层级深度"""
-    depth = 0
-    current = container
-    
-    # 向上遍历直到body或html
-    while current is not None and current.tag not in ['body', 'html']:
-        depth += 1
-        current = current.getparent()
-        if current is None:
-            break
-    
-    return depth
-def calculate_content_container_score(container):
+# 内容容器评分用的class/id特征词，按整词匹配（见 _word_tokens）
+_STRONG_INTERFERENCE_KEYWORDS = (
+    'header', 'footer', 'nav', 'navigation', 'menu', 'menubar', 
+    'topbar', 'bottom', 'sidebar', 'aside', 'banner', 'ad', 'advertisement'
+)
+_POSITIVE_CONTENT_KEYWORDS = (
+    'content', 'article', 'main', 'body', 'text', 'detail', 
+    'info', 'news', 'post', 'entry'
+)
+# 内容容器评分用的首部/尾部内容特征词，以及让首部关键词不计数的“当前位置”，一次扫描分组取出
+_CONTAINER_CONTENT_KEYWORDS = KeywordGroups(
+    [
+        '登录', '注册', '首页', '主页', '无障碍',  '办事',   '无障碍浏览','打印','收藏','机构概况','在线服务','互动交流',
+        '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府',
+        'login', 'register', 'home', 'menu', 'search', 'nav'
+    ],
+    [
+        '网站说明', '网站标识码', '版权所有', '主办单位', '承办单位', 
+        '技术支持', '联系我们', '网站地图', '隐私政策', '免责声明',
+        '备案号', 'icp', '公安备案', '政府网站', '网站管理',
+        'copyright', 'all rights reserved', 'powered by', 'designed by'
+    ],
+    ['当前位置', '当前的位置']
+)
+# 内容特征检测：(预编译正则, 权重, 特征名)
+_CONTENT_INDICATORS = tuple((re.compile(pattern), weight, name) for pattern, weight, name in [
+    # 时间特征
+    (r'\d{4}-\d{2}-\d{2}|\d{4}年\d{1,2}月\d{1,2}日|\d{4}/\d{1,2}/\d{1,2}|发布时间|更新日期|发布日期|成文日期', 30, '时间特征'),
+    # 公文特征
+    (r'通知|公告|意见|办法|规定|措施|方案|决定|指导|实施', 40, '公文特征'),
+    # 条款特征
+    (r'第[一二三四五六七八九十\d]+条|第[一二三四五六七八九十\d]+章|第[一二三四五六七八九十\d]+节', 35, '条款特征'),
+    # 政务信息特征
+    (r'索引号|主题分类|发文机关|发文字号|有效性', 25, '政务信息'),
+    # 附件特征
+    (r'附件|下载|pdf|doc|docx|文件下载', 20, '附件特征'),
+    # 内容结构特征
+    (r'为了|根据|按照|依据|现将|特制定|现印发|请结合实际', 30, '内容结构'),
+    # 新闻内容特征
+    (r'记者|报道|消息|新闻|采访|发表|刊登', 25, '新闻特征'),
+    # 正文内容特征
+    (r'正文|内容|详情|全文|摘要|概述', 20, '正文特征')
+])
+
+def calculate_content_container_score(container, cache=None):
     """计算内容容器得分 - 专注于识别真正的内容区域，大幅度减分干扰标签"""
     if container is None:
         logger.error("容器为None，无法计算得分")
         return -1000
+    if cache is None:
+        cache = NodeCache()
     
     score = 0
     debug_info = []
     
     classes = container.get('class', '').lower()
     elem_id = container.get('id', '').lower()
-    text_content = container.text_content()
-    text_length = len(text_content.strip())
+    # 每个容器都会评分，未开启DEBUG时跳过日志参数的拼接
+    verbose = logger.isEnabledFor(logging.DEBUG)
 
-    logger.info(f"\n=== 开始评分容器 ===")
-    logger.info(f"标签: {container.tag}")
-    logger.info(f"类名: {classes[:100]}{'...' if len(classes) > 100 else ''}")
-    logger.info(f"ID: {elem_id[:50]}{'...' if len(elem_id) > 50 else ''}")
-    logger.info(f"文本长度: {text_length}")
+    if verbose:
+        logger.debug(f"\n=== 开始评分容器 ===")
+        logger.debug(f"标签: {container.tag}")
+        logger.debug(f"类名: {classes[:100]}{'...' if len(classes) > 100 else ''}")
+        logger.debug(f"ID: {elem_id[:50]}{'...' if len(elem_id) > 50 else ''}")
+        logger.debug(f"文本长度: {cache.text_length(container)}")
 
     # 0. 检查 display:none - 直接排除不可见元素
     style = container.get('style', '').lower()
     if 'display' in style and 'none' in style:
         score -= 1000  # 极大减分，基本排除
-        debug_info.append("❌ display:none 不可见元素: -1000")
-        logger.info("❌ 发现 display:none，这是不可见元素，直接排除")
-        logger.info(f"最终得分: {score}")
+        if verbose:
+            debug_info.append("❌ display:none 不可见元素: -1000")
+            logger.debug("❌ 发现 display:none，这是不可见元素，直接排除")
+            logger.debug(f"最终得分: {score}")
         return score
     
     # 检查祖先元素是否有 display:none
@@ -1356,9 +1833,10 @@ def calculate_content_container_score(container):
         parent_style = current.get('style', '').lower()
         if 'display' in parent_style and 'none' in parent_style:
             score -= 800  # 祖先不可见，也要大幅减分
-            debug_info.append(f"❌ 祖先元素 display:none (第{depth+1}层): -800")
-            logger.info(f"❌ 第{depth+1}层祖先元素有 display:none，大幅减分")
-            logger.info(f"最终得分: {score}")
+            if verbose:
+                debug_info.append(f"❌ 祖先元素 display:none (第{depth+1}层): -800")
+                logger.debug(f"❌ 第{depth+1}层祖先元素有 display:none，大幅减分")
+                logger.debug(f"最终得分: {score}")
             return score
         current = current.getparent()
         depth += 1
@@ -1376,10 +1854,11 @@ def calculate_content_container_score(container):
     #         break
     # 首先进行大幅度减分检查 - 直接排除干扰标签
     # 1. 检查标签名 - 直接排除
-    if container.tag.lower() in ['header', 'footer', 'nav', 'aside']:
+    if container.tag in _INTERFERENCE_TAGS:
         score -= 500  # 极大减分，基本排除
-        debug_info.append(f"❌ 干扰标签: -{500} ({container.tag}) - 直接排除")
-        logger.info(f"❌ 发现干扰标签 {container.tag}，直接排除，得分: {score}")
+        if verbose:
+            debug_info.append(f"❌ 干扰标签: -{500} ({container.tag}) - 直接排除")
+            logger.debug(f"❌ 发现干扰标签 {container.tag}，直接排除，得分: {score}")
         return score  # 直接返回，不再计算其他分数
     
     # -------------------------------------------------------------------------
@@ -1411,308 +1890,294 @@ def calculate_content_container_score(container):
     # 2. 基于class/id的语义判断 - 这是最可靠的判断方式
     
     # 2.1 强干扰特征（导航、头部、尾部等）- 大幅减分
-    strong_interference_keywords = [
-        'header', 'footer', 'nav', 'navigation', 'menu', 'menubar', 
-        'topbar', 'bottom', 'sidebar', 'aside', 'banner', 'ad', 'advertisement'
-    ]
-
-    def create_pattern(keyword):
-        # 匹配单词边界，或被 -/_/space 包围
-        return re.compile(r'(^|[^\w-])' + re.escape(keyword) + r'([^\w-]|$)', re.IGNORECASE)
+    # classes和elem_id已经是小写
+    combined_text = f"{classes} {elem_id}".strip()
+    # 拆一次词，强干扰特征和正面特征都用集合查找
+    combined_tokens = _word_tokens(combined_text)
 
-    interference_patterns = {kw: create_pattern(kw) for kw in strong_interference_keywords}
-
-    interference_count = 0
-    found_interference_keywords = []
-
-    combined_text = f"{classes} {elem_id}".strip().lower()
-
-    for keyword, pattern in interference_patterns.items():
-        if pattern.search(combined_text):
-            interference_count += 1
-            found_interference_keywords.append(keyword)
+    found_interference_keywords = [
+        keyword for keyword in _STRONG_INTERFERENCE_KEYWORDS if keyword in combined_tokens
+    ]
+    interference_count = len(found_interference_keywords)
 
     if interference_count > 0:
         interference_penalty = interference_count * 200
         score -= interference_penalty
-        debug_info.append(f"❌ 强干扰特征: -{interference_penalty} (发现{interference_count}个: {', '.join(found_interference_keywords)})")
-        logger.info(f"❌ 发现强干扰特征: {', '.join(found_interference_keywords)}，减分: {interference_penalty}")
+        if verbose:
+            debug_info.append(f"❌ 强干扰特征: -{interference_penalty} (发现{interference_count}个: {', '.join(found_interference_keywords)})")
+            logger.debug(f"❌ 发现强干扰特征: {', '.join(found_interference_keywords)}，减分: {interference_penalty}")
         
         if interference_count >= 2:
-            logger.info(f"❌ 干扰特征过多({interference_count}个)，直接返回负分: {score}")
+            if verbose:
+                logger.debug(f"❌ 干扰特征过多({interference_count}个)，直接返回负分: {score}")
             return score
     
     # 2.2 正面内容特征 - 适当加分
-    positive_content_keywords = [
-        'content', 'article', 'main', 'body', 'text', 'detail', 
-        'info', 'news', 'post', 'entry'
+    found_positive_keywords = [
+        keyword for keyword in _POSITIVE_CONTENT_KEYWORDS if keyword in combined_tokens
     ]
-    
-    positive_count = 0
-    found_positive_keywords = []
-    
-    for keyword in positive_content_keywords:
-        pattern = create_pattern(keyword)
-        if pattern.search(combined_text):
-            positive_count += 1
-            found_positive_keywords.append(keyword)
+    positive_count = len(found_positive_keywords)
     
     if positive_count > 0:
         # 正面特征加分，但不要加太多
         positive_bonus = min(positive_count * 30, 90)
         score += positive_bonus
-        debug_info.append(f"✓ 正面内容特征: +{positive_bonus} (发现{positive_count}个: {', '.join(found_positive_keywords)})")
-        logger.info(f"✓ 发现正面内容特征: {', '.join(found_positive_keywords)}，加分: {positive_bonus}")
+        if verbose:
+            debug_info.append(f"✓ 正面内容特征: +{positive_bonus} (发现{positive_count}个: {', '.join(found_positive_keywords)})")
+            logger.debug(f"✓ 发现正面内容特征: {', '.join(found_positive_keywords)}，加分: {positive_bonus}")
 
-    # 4. 检查内容特征 - 识别首部尾部内容
-    header_content_keywords = [
-        '登录', '注册', '首页', '主页', '无障碍',  '办事',   '无障碍浏览','打印','收藏','机构概况','在线服务','互动交流',
-        '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府',
-        'login', 'register', 'home', 'menu', 'search', 'nav'
-    ]
+    # 不可见、干扰标签和强干扰特征过多的容器在上面已经返回，到这里才取子树文本
+    text_content = cache.text(container)
+    text_length = cache.text_length(container)
     
-    footer_content_keywords = [
-        '网站说明', '网站标识码', '版权所有', '主办单位', '承办单位', 
-        '技术支持', '联系我们', '网站地图', '隐私政策', '免责声明',
-        '备案号', 'icp', '公安备案', '政府网站', '网站管理',
-        'copyright', 'all rights reserved', 'powered by', 'designed by'
-    ]
-    
-    # 详细记录找到的关键词
-    found_header_keywords = [keyword for keyword in header_content_keywords if keyword in text_content.lower() and not (('当前位置' in text_content.lower()) or ('当前的位置' in  text_content.lower())) ]
-    found_footer_keywords = [keyword for keyword in footer_content_keywords if keyword in text_content.lower()]
+    # 4. 检查内容特征 - 识别首部尾部内容
+    # 详细记录找到的关键词；关键词一次扫描找出，包含“当前位置”的容器不计首部关键词
+    text_lower = cache.text_lower(container)
+    found_header_keywords, found_footer_keywords, found_location = _CONTAINER_CONTENT_KEYWORDS.found(text_lower)
+    if found_location:
+        found_header_keywords = []
     
     header_content_count = len(found_header_keywords)
     footer_content_count = len(found_footer_keywords)
     
     # 3. 简化的链接密度检查（辅助判断）
-    links = container.xpath(".//a[@href]")
+    href_count, href_text_length, structured_count = cache.content_stats(container)
     
-    if links and text_length > 0:
-        link_count = len(links)
-        link_text_total = sum(len(link.text_content().strip()) for link in links)
+    if href_count and text_length > 0:
+        link_count = href_count
+        link_text_total = href_text_length
         
         # 只计算最关键的指标：链接密度（每1000字符的链接数）
         links_per_100_chars = (link_count / text_length) * 10000
         link_text_ratio = link_text_total / text_length
         
-        logger.info(f"🔗 链接分析: {link_count}个链接, 密度={links_per_100_chars:.2f}个/5000字符, 占比={link_text_ratio:.1%}")
+        if verbose:
+            logger.debug(f"🔗 链接分析: {link_count}个链接, 密度={links_per_100_chars:.2f}个/5000字符, 占比={link_text_ratio:.1%}")
         
         # 简单判断：链接密度过高就减分
         if link_count > 5 :
             if links_per_100_chars > 5:
                 score -= 100
-                debug_info.append(f"❌ 极高链接密度: -100")
+                if verbose:
+                    debug_info.append(f"❌ 极高链接密度: -100")
             elif links_per_100_chars > 3:
                 score -= 50
-                debug_info.append(f"⚠ 高链接密度: -50")
+                if verbose:
+                    debug_info.append(f"⚠ 高链接密度: -50")
     
-    logger.info(f"📝 内容特征分析:")
-    logger.info(f"   首部关键词({header_content_count}个): {found_header_keywords}")
-    logger.info(f"   尾部关键词({footer_content_count}个): {found_footer_keywords}")
+    if verbose:
+        logger.debug(f"📝 内容特征分析:")
+        logger.debug(f"   首部关键词({header_content_count}个): {found_header_keywords}")
+        logger.debug(f"   尾部关键词({footer_content_count}个): {found_footer_keywords}")
     
     # 判断是否为长文本内容（正文内容通常很长）
     is_long_content = text_length > 3000
     
-    if is_long_content:
-        logger.info(f"✓ 检测到长文本内容({text_length}字符)，降低首尾部关键词减分力度")
+    if verbose and is_long_content:
+        logger.debug(f"✓ 检测到长文本内容({text_length}字符)，降低首尾部关键词减分力度")
     
     if header_content_count >= 5:
         if is_long_content:
             score -= 100
-            debug_info.append(f"⚠ 首部内容(长文本): -100 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
-            logger.info(f"⚠ 首部内容过多\文本较长，减分100")
+            if verbose:
+                debug_info.append(f"⚠ 首部内容(长文本): -100 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
+                logger.debug(f"⚠ 首部内容过多\文本较长，减分100")
         else:
             score -= 300
-            debug_info.append(f"❌ 首部内容: -300 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
-            logger.info(f"❌ 首部内容过多，减分300")
+            if verbose:
+                debug_info.append(f"❌ 首部内容: -300 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
+                logger.debug(f"❌ 首部内容过多，减分300")
     # 大幅减分首部尾部内容 - 但对长文本内容宽容处理
     elif header_content_count >= 3:
         if is_long_content:
             # 长文本内容，轻微减分
             score -= 1
-            debug_info.append(f"⚠ 首部内容(长文本): -1 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
-            logger.info(f"⚠ 首部内容过多但文本较长，轻微减分1")
+            if verbose:
+                debug_info.append(f"⚠ 首部内容(长文本): -1 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
+                logger.debug(f"⚠ 首部内容过多但文本较长，轻微减分1")
         else:
             score -= 300
-            debug_info.append(f"❌ 首部内容: -300 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
-            logger.info(f"❌ 首部内容过多，减分300")
+            if verbose:
+                debug_info.append(f"❌ 首部内容: -300 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
+                logger.debug(f"❌ 首部内容过多，减分300")
     elif header_content_count >= 2:
         if is_long_content:
             # 长文本内容，轻微减分
             score -= 1
-            debug_info.append(f"⚠ 首部内容(长文本): -1 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
-            logger.info(f"⚠ 首部内容较多但文本较长，轻微减分1")
+            if verbose:
+                debug_info.append(f"⚠ 首部内容(长文本): -1 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
+                logger.debug(f"⚠ 首部内容较多但文本较长，轻微减分1")
         else:
             score -= 150
-            debug_info.append(f"❌ 首部内容: -150 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
-            logger.info(f"❌ 首部内容较多，减分150")
+            if verbose:
+                debug_info.append(f"❌ 首部内容: -150 (发现{header_content_count}个关键词: {', '.join(found_header_keywords)})")
+                logger.debug(f"❌ 首部内容较多，减分150")
     
     if footer_content_count >= 3:
         if is_long_content:
             # 长文本内容，轻微减分
             score -= 100
-            debug_info.append(f"⚠ 尾部内容(长文本): -100 (发现{footer_content_count}个关键词: {', '.join(found_footer_keywords)})")
-            logger.info(f"⚠ 尾部内容过多但文本较长，轻微减分100")
+            if verbose:
+                debug_info.append(f"⚠ 尾部内容(长文本): -100 (发现{footer_content_count}个关键词: {', '.join(found_footer_keywords)})")
+                logger.debug(f"⚠ 尾部内容过多但文本较长，轻微减分100")
         else:
             score -= 300
-            debug_info.append(f"❌ 尾部内容: -300 (发现{footer_content_count}个关键词: {', '.join(found_footer_keywords)})")
-            logger.info(f"❌ 尾部内容过多，减分300")
+            if verbose:
+                debug_info.append(f"❌ 尾部内容: -300 (发现{footer_content_count}个关键词: {', '.join(found_footer_keywords)})")
+                logger.debug(f"❌ 尾部内容过多，减分300")
     elif footer_content_count >= 2:
         if is_long_content:
             # 长文本内容，轻微减分
             score -= 50
-            debug_info.append(f"⚠ 尾部内容(长文本): -50 (发现{footer_content_count}个关键词: {', '.join(found_footer_keywords)})")
-            logger.info(f"⚠ 尾部内容较多但文本较长，轻微减分50")
+            if verbose:
+                debug_info.append(f"⚠ 尾部内容(长文本): -50 (发现{footer_content_count}个关键词: {', '.join(found_footer_keywords)})")
+                logger.debug(f"⚠ 尾部内容较多但文本较长，轻微减分50")
         else:
             score -= 150
-            debug_info.append(f"❌ 尾部内容: -150 (发现{footer_content_count}个关键词: {', '.join(found_footer_keywords)})")
-            logger.info(f"❌ 尾部内容较多，减分150")
+            if verbose:
+                debug_info.append(f"❌ 尾部内容: -150 (发现{footer_content_count}个关键词: {', '.join(found_footer_keywords)})")
+                logger.debug(f"❌ 尾部内容较多，减分150")
     
     # 如果已经是严重负分，不再继续计算（但对长文本内容更宽容）
     if score < -200 and not is_long_content:
-        logger.info(f"❌ 当前得分过低({score})，停止后续计算")
-        debug_info.append(f"❌ 得分过低，停止计算: {score}")
+        if verbose:
+            logger.debug(f"❌ 当前得分过低({score})，停止后续计算")
+            debug_info.append(f"❌ 得分过低，停止计算: {score}")
         return score
     elif score < -200 and is_long_content:
-        logger.info(f"⚠ 当前得分较低({score})，但文本较长({text_length}字符)，继续计算")
+        if verbose:
+            logger.debug(f"⚠ 当前得分较低({score})，但文本较长({text_length}字符)，继续计算")
     
     # 5. 基础内容长度评分
-    logger.info(f"📏 内容长度评分: {text_length}字符")
+    if verbose:
+        logger.debug(f"📏 内容长度评分: {text_length}字符")
     if text_length > 5000:
         score+=200
-        debug_info.append("✓ 超长内容: +200")
-        logger.info(f"✓ 超长内容加分: +200")
+        if verbose:
+            debug_info.append("✓ 超长内容: +200")
+            logger.debug(f"✓ 超长内容加分: +200")
     elif text_length > 1000:
         score += 50
-        debug_info.append("✓ 长内容: +50")
-        logger.info(f"✓ 长内容加分: +50")
+        if verbose:
+            debug_info.append("✓ 长内容: +50")
+            logger.debug(f"✓ 长内容加分: +50")
     elif text_length > 500:
         score += 35
-        debug_info.append("✓ 中等内容: +35")
-        logger.info(f"✓ 中等内容加分: +35")
+        if verbose:
+            debug_info.append("✓ 中等内容: +35")
+            logger.debug(f"✓ 中等内容加分: +35")
     elif text_length > 200:
         score += 20
-        debug_info.append("✓ 短内容: +20")
-        logger.info(f"✓ 短内容加分: +20")
+        if verbose:
+            debug_info.append("✓ 短内容: +20")
+            logger.debug(f"✓ 短内容加分: +20")
     elif text_length < 50:
         score -= 20
-        debug_info.append("❌ 内容太少: -20")
-        logger.info(f"❌ 内容太少减分: -20")
+        if verbose:
+            debug_info.append("❌ 内容太少: -20")
+            logger.debug(f"❌ 内容太少减分: -20")
     
     # 6. Role属性检查
     role = container.get('role', '').lower()
-    logger.info(f"🎭 Role属性: '{role}'")
+    if verbose:
+        logger.debug(f"🎭 Role属性: '{role}'")
     if role == 'viewlist':
         score += 150
-        debug_info.append("✓ Role特征: +150 (role='viewlist')")
-        logger.info(f"✓ 发现viewlist角色，加分150")
-    elif role in ['list', 'listbox', 'grid', 'main', 'article']:
+        if verbose:
+            debug_info.append("✓ Role特征: +150 (role='viewlist')")
+            logger.debug(f"✓ 发现viewlist角色，加分150")
+    elif role in _CONTENT_ROLES:
         score += 50
-        debug_info.append(f"✓ Role特征: +50 (role='{role}')")
-        logger.info(f"✓ 发现{role}角色，加分50")
+        if verbose:
+            debug_info.append(f"✓ Role特征: +50 (role='{role}')")
+            logger.debug(f"✓ 发现{role}角色，加分50")
     
     # 7. 内容特征检测 - 不限于列表
-    content_indicators = [
-        # 时间特征
-        (r'\d{4}-\d{2}-\d{2}|\d{4}年\d{1,2}月\d{1,2}日|\d{4}/\d{1,2}/\d{1,2}|发布时间|更新日期|发布日期|成文日期', 30, '时间特征'),
-        # 公文特征
-        (r'通知|公告|意见|办法|规定|措施|方案|决定|指导|实施', 40, '公文特征'),
-        # 条款特征
-        (r'第[一二三四五六七八九十\d]+条|第[一二三四五六七八九十\d]+章|第[一二三四五六七八九十\d]+节', 35, '条款特征'),
-        # 政务信息特征
-        (r'索引号|主题分类|发文机关|发文字号|有效性', 25, '政务信息'),
-        # 附件特征
-        (r'附件|下载|pdf|doc|docx|文件下载', 20, '附件特征'),
-        # 内容结构特征
-        (r'为了|根据|按照|依据|现将|特制定|现印发|请结合实际', 30, '内容结构'),
-        # 新闻内容特征
-        (r'记者|报道|消息|新闻|采访|发表|刊登', 25, '新闻特征'),
-        # 正文内容特征
-        (r'正文|内容|详情|全文|摘要|概述', 20, '正文特征')
-    ]
-    
     total_content_score = 0
     matched_features = []
     
-    logger.info(f"🔍 内容特征检测:")
-    for pattern, weight, feature_name in content_indicators:
-        matches = re.findall(pattern, text_content)
-        if matches:
+    if verbose:
+        logger.debug(f"🔍 内容特征检测:")
+    for pattern, weight, feature_name in _CONTENT_INDICATORS:
+        # 加分只看是否命中；匹配个数只用于调试输出，开启DEBUG时才统计
+        if pattern.search(text_content):
             total_content_score += weight
-            matched_features.append(f"{feature_name}({len(matches)})")
-            logger.info(f"   ✓ {feature_name}: 找到{len(matches)}个匹配，加分{weight}")
+            if verbose:
+                match_count = sum(1 for _ in pattern.finditer(text_content))
+                matched_features.append(f"{feature_name}({match_count})")
+                logger.debug(f"   ✓ {feature_name}: 找到{match_count}个匹配，加分{weight}")
     
     if total_content_score > 0:
         final_content_score = min(total_content_score, 120)
         score += final_content_score
-        debug_info.append(f"✓ 内容特征: +{final_content_score} ({','.join(matched_features)})")
-        logger.info(f"✓ 内容特征总加分: {final_content_score} (原始分数: {total_content_score})")
-    else:
-        logger.info(f"   ❌ 未发现内容特征")
+        if verbose:
+            debug_info.append(f"✓ 内容特征: +{final_content_score} ({','.join(matched_features)})")
+            logger.debug(f"✓ 内容特征总加分: {final_content_score} (原始分数: {total_content_score})")
+    elif verbose:
+        logger.debug(f"   ❌ 未发现内容特征")
     
     # 8. 额外的正面特征检查（已在步骤2.2中处理，避免重复加分）
     
     # 9. 结构化内容检测 - 不限于列表
-    structured_elements = container.xpath(".//p | .//h1 | .//h2 | .//h3 | .//h4 | .//h5 | .//h6 | .//li | .//table | .//div[contains(@class,'content')] | .//section")
-    if len(structured_elements) > 5:
-        structure_score = min(len(structured_elements) * 2, 40)
+    if structured_count > 5:
+        structure_score = min(structured_count * 2, 40)
         score += structure_score
-        debug_info.append(f"结构化内容: +{structure_score}")
+        if verbose:
+            debug_info.append(f"结构化内容: +{structure_score}")
     
     # 10. 图片内容
-    images = container.xpath(".//img")
-    if len(images) > 0:
-        image_score = min(len(images) * 3, 150)
+    image_count = cache.census(container)[2]
+    if image_count > 0:
+        image_score = min(image_count * 3, 150)
         score += image_score
-        debug_info.append(f"图片内容: +{image_score}")
+        if verbose:
+            debug_info.append(f"图片内容: +{image_score}")
     
     # 输出调试信息
-    container_info = f"{container.tag} class='{classes[:30]}'"
-    logger.info(f"容器评分: {score} - {container_info}")
-    for info in debug_info:
-        logger.info(f"  {info}")
+    if verbose:
+        container_info = f"{container.tag} class='{classes[:30]}'"
+        logger.debug(f"容器评分: {score} - {container_info}")
+        for info in debug_info:
+            logger.debug(f"  {info}")
     
     return score
 
 def exclude_page_header_footer(body):
     """排除页面级别的header和footer"""
-    children = body.xpath("./div | ./main | ./section | ./article")
+    children = _XP_DIRECT_CONTENT_CHILDREN(body)
     
     if not children:
         return body
     
     valid_children = []
+    footer_cache = {}
     for child in children:
-        if not is_page_level_header_footer(child):
+        if not is_page_level_header_footer(child, footer_cache):
             valid_children.append(child)
     
     return find_middle_content(valid_children)
 
-def is_page_level_header_footer(element):
+# 页面级别的header/footer特征
+_RE_PAGE_LEVEL_KEYWORDS = _compile_indicators(['header', 'footer', 'nav', 'menu', 'topbar', 'bottom', 'top'])
+
+def is_page_level_header_footer(element, footer_cache=None):
     """判断是否是页面级别的header或footer - 更严格的检查"""
-    classes = element.get('class', '').lower()
-    elem_id = element.get('id', '').lower()
-    tag_name = element.tag.lower()
-    
     # 检查标签名
-    if tag_name in ['header', 'footer', 'nav']:
+    if element.tag in _PAGE_LEVEL_TAGS:
         return True
     
     # 检查是否在footer区域
-    is_footer, _ = is_in_footer_area(element)
+    is_footer, _ = is_in_footer_area(element, footer_cache)
     if is_footer:
         return True
     
     # 检查页面级别的header/footer特征
-    page_keywords = ['header', 'footer', 'nav', 'menu', 'topbar', 'bottom', 'top']
-    for keyword in page_keywords:
-        if keyword in classes or keyword in elem_id:
-            return True
+    if _RE_PAGE_LEVEL_KEYWORDS.search(_class_id_text(element)):
+        return True
     
     # 检查role属性
     role = element.get('role', '').lower()
-    if role in ['banner', 'navigation', 'contentinfo']:
+    if role in _PAGE_LEVEL_ROLES:
         return True
     
     return False
@@ -1727,23 +2192,24 @@ def find_middle_content(valid_children):
     
     # 计算每个容器的内容得分
     scored_containers = []
+    cache = NodeCache()
     for container in valid_children:
-        score = calculate_content_richness(container)
+        score = calculate_content_richness(container, cache)
         scored_containers.append((container, score))
     
-    # 选择得分最高的容器
-    scored_containers.sort(key=lambda x: x[1], reverse=True)
-    best_container = scored_containers[0][0]
+    # 选择得分最高的容器（并列时取先出现的）
+    best_container, best_score = max(scored_containers, key=lambda x: x[1])
     
-    logger.info(f"页面主体容器得分: {scored_containers[0][1]}")
+    logger.info(f"页面主体容器得分: {best_score}")
     return best_container
 
-def calculate_content_richness(container):
+def calculate_content_richness(container, cache=None):
     """计算容器的内容丰富度"""
+    if cache is None:
+        cache = NodeCache()
     score = 0
     
-    text_content = container.text_content().strip()
-    content_length = len(text_content)
+    content_length = cache.text_length(container)
     
     if content_length > 1000:
         score += 40
@@ -1757,20 +2223,20 @@ def calculate_content_richness(container):
         return -5
     
     # 检查图片数量
-    images = container.xpath(".//img")
-    if len(images) > 0:
-        score += min(len(images) * 3, 20)
+    image_count = cache.census(container)[2]
+    if image_count > 0:
+        score += min(image_count * 3, 20)
     
     # 检查结构化内容
-    structured_elements = container.xpath(".//p | .//div[contains(@style, 'text-align')] | .//h1 | .//h2 | .//h3")
-    if len(structured_elements) > 0:
-        score += min(len(structured_elements) * 2, 25)
+    structured_count = sum(cache.structure(container))
+    if structured_count > 0:
+        score += min(structured_count * 2, 25)
     
     return score
 
 def exclude_local_header_footer(container):
     """在容器内部排除局部的header和footer"""
-    children = container.xpath("./div | ./section | ./article")
+    children = _XP_LOCAL_CONTENT_CHILDREN(container)
     
     if not children:
         return container
@@ -1785,14 +2251,16 @@ def exclude_local_header_footer(container):
     
     return select_content_container(valid_children)
 
+# 局部header/footer的class/id特征词
+_LOCAL_HEADER_FOOTER_KEYWORDS = ('title', 'tit', 'head', 'foot', 'top', 'bottom', 'nav', 'menu')
+
 def is_local_header_footer(element):
     """判断是否是局部的header或footer"""
     classes = element.get('class', '').lower()
     elem_id = element.get('id', '').lower()
     
     # 检查局部header/footer特征
-    local_keywords = ['title', 'tit', 'head', 'foot', 'top', 'bottom', 'nav', 'menu']
-    for keyword in local_keywords:
+    for keyword in _LOCAL_HEADER_FOOTER_KEYWORDS:
         if keyword in classes or keyword in elem_id:
             # 进一步检查是否真的是header/footer
             text_content = element.text_content().strip()
@@ -1808,22 +2276,27 @@ def select_content_container(valid_children):
     
     # 计算每个容器的得分
     scored_containers = []
+    cache = NodeCache()
     for container in valid_children:
-        score = calculate_final_score(container)
+        score = calculate_final_score(container, cache)
         scored_containers.append((container, score))
     
-    # 选择得分最高的容器
-    scored_containers.sort(key=lambda x: x[1], reverse=True)
-    best_container = scored_containers[0][0]
+    # 选择得分最高的容器（并列时取先出现的）
+    best_container, _ = max(scored_containers, key=lambda x: x[1])
     
     return best_container
 
-def calculate_final_score(container):
+# 最终评分、主内容评分用的class/id内容特征词
+_FINAL_CONTENT_KEYWORDS = ('content', 'article', 'detail', 'main', 'body', 'text', 'editor', 'con')
+_MAIN_CONTENT_KEYWORDS = ('content', 'main', 'article', 'detail', 'body')
+
+def calculate_final_score(container, cache=None):
     """计算最终容器得分"""
+    if cache is None:
+        cache = NodeCache()
     score = 0
     
-    text_content = container.text_content().strip()
-    content_length = len(text_content)
+    content_length = cache.text_length(container)
     
     if content_length > 500:
         score += 30
@@ -1835,15 +2308,14 @@ def calculate_final_score(container):
         score += 5
     
     # 检查图片
-    images = container.xpath(".//img")
-    if len(images) > 0:
-        score += min(len(images) * 4, 25)
+    image_count = cache.census(container)[2]
+    if image_count > 0:
+        score += min(image_count * 4, 25)
     
     # 检查结构化内容
-    styled_divs = container.xpath(".//div[contains(@style, 'text-align')]")
-    paragraphs = container.xpath(".//p")
+    paragraphs, _, styled_divs = cache.structure(container)
     
-    structure_count = len(styled_divs) + len(paragraphs)
+    structure_count = styled_divs + paragraphs
     if structure_count > 0:
         score += min(structure_count * 2, 20)
     
@@ -1851,8 +2323,7 @@ def calculate_final_score(container):
     classes = container.get('class', '').lower()
     elem_id = container.get('id', '').lower()
     
-    content_keywords = ['content', 'article', 'detail', 'main', 'body', 'text', 'editor', 'con']
-    for keyword in content_keywords:
+    for keyword in _FINAL_CONTENT_KEYWORDS:
         if keyword in classes or keyword in elem_id:
             score += 15
     
@@ -1861,28 +2332,29 @@ def calculate_final_score(container):
 def find_main_content_area(containers):
     """在有效容器中找到主内容区域"""
     candidates = []
+    cache = NodeCache()
     
     for container in containers:
-        score = calculate_main_content_score(container)
+        score = calculate_main_content_score(container, cache)
         if score > 0:
             candidates.append((container, score))
     
     if not candidates:
         return None
     
-    # 选择得分最高的作为主内容区域
-    candidates.sort(key=lambda x: x[1], reverse=True)
-    main_area = candidates[0][0]
+    # 选择得分最高的作为主内容区域（并列时取先出现的）
+    main_area, main_score = max(candidates, key=lambda x: x[1])
     
-    logger.info(f"主内容区域得分: {candidates[0][1]}")
+    logger.info(f"主内容区域得分: {main_score}")
     return main_area
 
-def calculate_main_content_score(container):
+def calculate_main_content_score(container, cache=None):
     """计算主内容区域得分"""
+    if cache is None:
+        cache = NodeCache()
     score = 0
     
-    text_content = container.text_content().strip()
-    content_length = len(text_content)
+    content_length = cache.text_length(container)
     
     # 内容长度是主要指标
     if content_length > 500:
@@ -1895,16 +2367,15 @@ def calculate_main_content_score(container):
         return -5  # 内容太少
     
     # 检查是否包含丰富内容
-    images = container.xpath(".//img")
-    if len(images) > 0:
-        score += min(len(images) * 2, 15)
+    image_count = cache.census(container)[2]
+    if image_count > 0:
+        score += min(image_count * 2, 15)
     
     # 检查类名特征
     classes = container.get('class', '').lower()
     elem_id = container.get('id', '').lower()
     
-    content_keywords = ['content', 'main', 'article', 'detail', 'body']
-    for keyword in content_keywords:
+    for keyword in _MAIN_CONTENT_KEYWORDS:
         if keyword in classes or keyword in elem_id:
             score += 15
     
@@ -1921,29 +2392,49 @@ def calculate_main_content_score(container):
 
 
 
-def is_in_footer_area(element):
-    """检查元素是否在footer区域"""
+# footer相关特征，顺序决定返回信息里报告的特征词
+_FOOTER_AREA_INDICATORS = (
+    'footer', 'bottom', 'foot', 'end', 'copyright', 
+    'links', 'sitemap', 'contact', 'about'
+)
+_RE_FOOTER_AREA_INDICATORS = _compile_indicators(_FOOTER_AREA_INDICATORS)
+
+def _footer_area_feature(element):
+    """
+    检查元素自身的footer特征：命中特征词返回该词，只有底部样式返回空字符串，都没有返回None
+    """
+    # footer标签与第一个特征词一起命中
+    if element.tag == 'footer':
+        return _FOOTER_AREA_INDICATORS[0]
+    
+    class_id = _class_id_text(element)
+    if _RE_FOOTER_AREA_INDICATORS.search(class_id):
+        return next(indicator for indicator in _FOOTER_AREA_INDICATORS if indicator in class_id)
+    
+    # 检查是否在页面底部区域（通过样式或位置判断）
+    style = element.get('style', '').lower()
+    if 'bottom' in style or 'fixed' in style:
+        return ''
+    return None
+
+def is_in_footer_area(element, footer_cache=None):
+    """
+    检查元素是否在footer区域
+    footer_cache 为字典时缓存每个元素自身的特征，兄弟容器共享祖先时不再重复检查
+    """
     current = element
     depth = 0
     while current is not None and depth < 10:  # 检查10层祖先
-        classes = current.get('class', '').lower()
-        elem_id = current.get('id', '').lower()
-        tag_name = current.tag.lower()
-        
-        # 检查footer相关特征
-        footer_indicators = [
-            'footer', 'bottom', 'foot', 'end', 'copyright', 
-            'links', 'sitemap', 'contact', 'about'
-        ]
-        
-        for indicator in footer_indicators:
-            if (indicator in classes or indicator in elem_id or 
-                (tag_name == 'footer')):
-                return True, f"发现footer特征: {indicator} (第{depth}层)"
+        if footer_cache is None:
+            feature = _footer_area_feature(current)
+        elif current in footer_cache:
+            feature = footer_cache[current]
+        else:
+            feature = footer_cache[current] = _footer_area_feature(current)
         
-        # 检查是否在页面底部区域（通过样式或位置判断）
-        style = current.get('style', '').lower()
-        if 'bottom' in style or 'fixed' in style:
+        if feature:
+            return True, f"发现footer特征: {feature} (第{depth}层)"
+        if feature is not None:
             return True, f"发现底部样式 (第{depth}层)"
         
         current = current.getparent()
@@ -1951,28 +2442,107 @@ def is_in_footer_area(element):
     
     return False, ""
 
+# 列表容器评分用的精确时间特征
+_PRECISE_TIME_PATTERNS = tuple(re.compile(pattern) for pattern in [
+    r'\d{4}-\d{2}-\d{2}',  # YYYY-MM-DD
+    r'\d{4}年\d{1,2}月\d{1,2}日',  # 完整的中文日期
+    r'\d{4}/\d{1,2}/\d{1,2}',  # YYYY/MM/DD
+    r'发布时间', r'更新日期', r'发布日期', r'创建时间'
+])
+
+# 列表容器评分用的首部/尾部内容特征词
+_LIST_CONTENT_KEYWORDS = KeywordGroups(
+    [
+        '登录', '注册', '首页', '主页', '无障碍', '办事', '无障碍浏览','打印','收藏','机构概况','在线服务','互动交流',
+        '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府',
+        '长者模式','微信','ipv6','信息公开',
+        'login', 'register', 'home', 'menu', 'search', 'nav'
+    ],
+    [
+        '网站说明', '网站标识码', '版权所有', '主办单位', '承办单位', 
+        '技术支持', '联系我们', '网站地图', '隐私政策', '免责声明',
+        '备案号', 'icp', '公安备案', '政府网站', '网站管理',
+        'copyright', 'all rights reserved', 'powered by', 'designed by'
+    ]
+)
+# 列表容器及其祖先的footer、header/nav结构特征词，以及正面结构特征词
+_LIST_FOOTER_STRUCTURE_INDICATORS = ('footer', 'foot', 'bottom', 'end', 'copyright', 'links', 'sitemap')
+_LIST_HEADER_STRUCTURE_INDICATORS = ('header', 'nav', 'navigation', 'menu', 'topbar', 'banner', 'menubar')
+_LIST_POSITIVE_INDICATORS = ('content', 'main', 'news', 'article', 'data', 'info', 'detail', 'result', 'list')
+# 列表项中的强导航词
+_LIST_NAV_MATCHER = KeywordMatcher([
+    '登录', '注册', '首页', '主页', '无障碍', '办事', '无障碍浏览','打印','收藏','机构概况','在线服务','互动交流',
+    '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府',
+    'login', 'register', 'home', 'menu', 'search', 'nav'
+])
+# check_negative_ancestry 用的祖先class/id结构特征词和文本特征词（尾部在前、首部在后）
+_ANCESTRY_STRUCTURE_MATCHER = KeywordMatcher(['nav', 'menu', 'sidebar', 'header', 'topbar', 'navigation', 'head'])
+_ANCESTRY_CONTENT_MATCHER = KeywordMatcher([
+    '网站说明', '网站标识码', '版权所有', '备案号',
+    '登录', '注册', '首页', '无障碍'
+])
+# has_negative_ancestor 用的祖先class/id结构特征词，以及首部、尾部文本特征词
+_NEGATIVE_ANCESTOR_STRUCTURE_MATCHER = KeywordMatcher([
+    'footer', 'nav', 'menu', 'sidebar', 'header', 'topbar', 'navigation', 'foot', 'head'
+])
+_NEGATIVE_ANCESTOR_CONTENT_KEYWORDS = KeywordGroups(
+    ['登录', '注册', '首页', '主页', '无障碍', '办事', '走进'],
+    ['网站说明', '网站标识码', '版权所有', '备案号', 'icp', '主办单位', '承办单位']
+)
+
 def find_list_container(page_tree):
     # 首先尝试使用改进的文章容器查找算法
     article_container = find_article_container(page_tree)
     if article_container is not None:
         return article_container    
-    list_selectors = [
-        "//li", "//tr", "//article",
-        "//div[contains(@class, 'item')]",
-        "//div[contains(@class, 'list')]",
-        "//ul//li", "//ol//li", "//table//tr",
-        "//section//ul[contains(@class, 'item')]",
-        "//section//ul[contains(@class, 'list')]",
-        "//section//div[contains(@class, 'list')]",
-        "//section//div[contains(@class, 'item')]"
-    ]
+    
+    # 候选容器、父级及其祖先会被反复评分，小写文本按元素缓存
+    cache = NodeCache()
     
     def count_list_items(element):
-        items = element.xpath(".//li | .//tr | .//article | .//div[contains(@class, 'item')]")
+        items = cache.list_stats(element)[0]
         return len(items)
     
+    # 向上搜索时同一元素会被反复评分，得分和评分日志按元素缓存
+    score_cache = {}
+    # 评分日志只在INFO级别输出，级别更高时不拼接评分明细
+    verbose = logger.isEnabledFor(logging.INFO)
+    # 各候选容器的祖先大量重叠，祖先链（含小写的class、id）按元素缓存；祖先检查最多看5层
+    chain_cache = {}
+    chain_limit = 5
+    
+    def ancestor_chain(element):
+        """返回元素自身及其祖先（共最多5层）的 (元素, 小写class, 小写id) 元组，由近及远"""
+        chain = chain_cache.get(element)
+        if chain is None:
+            # 向上找到第一个已缓存的祖先，再由远及近补齐路径上各元素的祖先链
+            pending = []
+            chain = ()
+            current = element
+            while current is not None:
+                cached = chain_cache.get(current)
+                if cached is not None:
+                    chain = cached
+                    break
+                pending.append(current)
+                current = current.getparent()
+            for node in reversed(pending):
+                link = (node, node.get('class', '').lower(), node.get('id', '').lower())
+                chain = chain_cache[node] = (link,) + chain[:chain_limit - 1]
+        return chain
+    
     def calculate_container_score(container):
-        """计算容器作为目标列表的得分 - 第一轮严格过滤首部尾部"""
+        """计算容器作为目标列表的得分，重复评分时直接取缓存并重新输出评分日志"""
+        cached = score_cache.get(container)
+        if cached is None:
+            cached = score_cache[container] = score_container(container)
+        score, messages = cached
+        for message in messages:
+            logger.info(message)
+        return score
+    
+    def score_container(container):
+        """计算容器作为目标列表的得分 - 第一轮严格过滤首部尾部，返回 (得分, 评分日志)"""
         score = 0
         debug_info = []
         
@@ -1980,204 +2550,170 @@ def find_list_container(page_tree):
         classes = container.get('class', '').lower()
         elem_id = container.get('id', '').lower()
         role = container.get('role', '').lower()
-        tag_name = container.tag.lower()
-        text_content = container.text_content().lower()
+        tag_name = container.tag
+        text_content = cache.text_lower(container)
         
         # 第一轮过滤：根据内容特征直接排除首部和尾部容器
-        # 1. 检查首部特征内容
-        header_content_keywords = [
-            '登录', '注册', '首页', '主页', '无障碍', '办事', '无障碍浏览','打印','收藏','机构概况','在线服务','互动交流',
-            '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府',
-            '长者模式','微信','ipv6','信息公开',
-            'login', 'register', 'home', 'menu', 'search', 'nav'
-        ]
+        # 首部、尾部特征内容一次扫描分组统计
+        found_header_content, found_footer_content = _LIST_CONTENT_KEYWORDS.found(text_content)
         
-        header_content_count = 0
-        for keyword in header_content_keywords:
-            if keyword in text_content:
-                header_content_count += 1
+        # 1. 检查首部特征内容
+        header_content_count = len(found_header_content)
         
         # 如果包含多个首部关键词，严重减分
         if header_content_count >= 2:
             score -= 300  # 极严重减分，基本排除
-            debug_info.append(f"首部内容特征: -300 (发现{header_content_count}个首部关键词)")
+            if verbose:
+                debug_info.append(f"首部内容特征: -300 (发现{header_content_count}个首部关键词)")
         
         # 2. 检查尾部特征内容
-        footer_content_keywords = [
-            '网站说明', '网站标识码', '版权所有', '主办单位', '承办单位', 
-            '技术支持', '联系我们', '网站地图', '隐私政策', '免责声明',
-            '备案号', 'icp', '公安备案', '政府网站', '网站管理',
-            'copyright', 'all rights reserved', 'powered by', 'designed by'
-        ]
-        
-        footer_content_count = 0
-        for keyword in footer_content_keywords:
-            if keyword in text_content:
-                footer_content_count += 1
+        footer_content_count = len(found_footer_content)
         
         # 如果包含多个尾部关键词，严重减分
         if footer_content_count >= 2:
             score -= 300  # 极严重减分，基本排除
-            debug_info.append(f"尾部内容特征: -300 (发现{footer_content_count}个尾部关键词)")
+            if verbose:
+                debug_info.append(f"尾部内容特征: -300 (发现{footer_content_count}个尾部关键词)")
         
         # 3. 检查结构特征 - footer/header标签和类名
-        footer_structure_indicators = ['footer', 'foot', 'bottom', 'end', 'copyright', 'links', 'sitemap']
-        for indicator in footer_structure_indicators:
+        for indicator in _LIST_FOOTER_STRUCTURE_INDICATORS:
             if (indicator in classes or indicator in elem_id or 
                 indicator in role or tag_name == 'footer'):
                 score -= 250  # 极严重减分
-                debug_info.append(f"Footer结构特征: -250 (发现'{indicator}')")
+                if verbose:
+                    debug_info.append(f"Footer结构特征: -250 (发现'{indicator}')")
         
         # 4. 检查header/nav结构特征
-        header_structure_indicators = ['header', 'nav', 'navigation', 'menu', 'topbar', 'banner', 'menubar']
-        for indicator in header_structure_indicators:
+        for indicator in _LIST_HEADER_STRUCTURE_INDICATORS:
             if (indicator in classes or indicator in elem_id or 
-                indicator in role or tag_name in ['header', 'nav','menu']):
+                indicator in role or tag_name in _LIST_HEADER_TAGS):
                 score -= 200  # 严重减分
-                debug_info.append(f"Header结构特征: -200 (发现'{indicator}')")
+                if verbose:
+                    debug_info.append(f"Header结构特征: -200 (发现'{indicator}')")
         
         # 5. 检查祖先元素的负面特征（但权重降低，因为第一轮已经过滤了大部分）
-        current = container
-        depth = 0
-        while current is not None and depth < 5:  # 减少检查层级
-            parent_classes = current.get('class', '').lower()
-            parent_id = current.get('id', '').lower()
-            parent_tag = current.tag.lower()
+        for depth, (current, parent_classes, parent_id) in enumerate(ancestor_chain(container)[:5]):  # 减少检查层级
+            parent_tag = current.tag
             
             # 检查祖先的footer特征
-            for indicator in footer_structure_indicators:
+            for indicator in _LIST_FOOTER_STRUCTURE_INDICATORS:
                 if (indicator in parent_classes or indicator in parent_id or parent_tag == 'footer'):
                     penalty = max(60 - depth * 10, 15)  # 减少祖先特征的权重
                     score -= penalty
-                    debug_info.append(f"祖先Footer: -{penalty} (第{depth}层'{indicator}')")
+                    if verbose:
+                        debug_info.append(f"祖先Footer: -{penalty} (第{depth}层'{indicator}')")
             
             # 检查祖先的header/nav特征
-            for indicator in header_structure_indicators:
-                if (indicator in parent_classes or indicator in parent_id or parent_tag in ['header', 'nav']):
+            for indicator in _LIST_HEADER_STRUCTURE_INDICATORS:
+                if (indicator in parent_classes or indicator in parent_id or parent_tag in _LIST_ANCESTOR_HEADER_TAGS):
                     penalty = max(50 - depth * 8, 12)  # 减少祖先特征的权重
                     score -= penalty
-                    debug_info.append(f"祖先Header: -{penalty} (第{depth}层'{indicator}')")
-            
-            current = current.getparent()
-            depth += 1
+                    if verbose:
+                        debug_info.append(f"祖先Header: -{penalty} (第{depth}层'{indicator}')")
         
         # 如果已经是严重负分，直接返回，不需要继续计算
         if score < -150:
-            return score
+            return score, ()
         
         # 6. 正面特征评分 - 专注于内容质量
         # 检查时间特征（强正面特征）
-        precise_time_patterns = [
-            r'\d{4}-\d{2}-\d{2}',  # YYYY-MM-DD
-            r'\d{4}年\d{1,2}月\d{1,2}日',  # 完整的中文日期
-            r'\d{4}/\d{1,2}/\d{1,2}',  # YYYY/MM/DD
-            r'发布时间', r'更新日期', r'发布日期', r'创建时间'
-        ]
-        
         precise_matches = 0
-        for pattern in precise_time_patterns:
-            matches = len(re.findall(pattern, text_content))
-            precise_matches += matches
+        for pattern in _PRECISE_TIME_PATTERNS:
+            precise_matches += sum(1 for _ in pattern.finditer(text_content))
         
         if precise_matches > 0:
             time_score = min(precise_matches * 30, 90)  # 增加时间特征权重
             score += time_score
-            debug_info.append(f"时间特征: +{time_score} ({precise_matches}个匹配)")
+            if verbose:
+                debug_info.append(f"时间特征: +{time_score} ({precise_matches}个匹配)")
         
         # 7. 检查内容长度和质量
-        items = container.xpath(".//*[self::li or self::tr or self::article or self::div[contains(@class, 'item')]]")
+        items, image_count, link_count = cache.list_stats(container)
         if items:
-            total_length = sum(len(item.text_content().strip()) for item in items)
+            total_length = sum(cache.text_length(item) for item in items)
             avg_length = total_length / len(items) if items else 0
             
             if avg_length > 150:
                 score += 40  # 增加长内容的权重
-                debug_info.append(f"文本长度: +40 (平均{avg_length:.1f}字符)")
+                if verbose:
+                    debug_info.append(f"文本长度: +40 (平均{avg_length:.1f}字符)")
             elif avg_length > 80:
                 score += 30
-                debug_info.append(f"文本长度: +30 (平均{avg_length:.1f}字符)")
+                if verbose:
+                    debug_info.append(f"文本长度: +30 (平均{avg_length:.1f}字符)")
             elif avg_length > 40:
                 score += 20
-                debug_info.append(f"文本长度: +20 (平均{avg_length:.1f}字符)")
+                if verbose:
+                    debug_info.append(f"文本长度: +20 (平均{avg_length:.1f}字符)")
             elif avg_length < 20:  # 文本太短，可能是导航
                 score -= 20
-                debug_info.append(f"文本长度: -20 (平均{avg_length:.1f}字符，太短)")
+                if verbose:
+                    debug_info.append(f"文本长度: -20 (平均{avg_length:.1f}字符，太短)")
         
         # 8. 检查正面结构特征
-        strong_positive_indicators = ['content', 'main', 'news', 'article', 'data', 'info', 'detail', 'result', 'list']
         positive_score = 0
-        for indicator in strong_positive_indicators:
+        for indicator in _LIST_POSITIVE_INDICATORS:
             if indicator in classes or indicator in elem_id:
                 positive_score += 25  # 增加正面特征权重
-                debug_info.append(f"正面特征: +25 ('{indicator}')")
+                if verbose:
+                    debug_info.append(f"正面特征: +25 ('{indicator}')")
         
         score += min(positive_score, 75)  # 限制正面特征的最大加分
         
-        # 9. 检查内容多样性（图片、链接等）
-        images = container.xpath(".//img")
-        links = container.xpath(".//a[@href]")
-        
-        if len(images) > 0:
-            image_score = min(len(images) * 3, 20)
+        # 9. 检查内容多样性（图片、链接等），数量已在第7步的同一次遍历中统计
+        if image_count > 0:
+            image_score = min(image_count * 3, 20)
             score += image_score
-            debug_info.append(f"图片内容: +{image_score} ({len(images)}张图片)")
+            if verbose:
+                debug_info.append(f"图片内容: +{image_score} ({image_count}张图片)")
         
-        if len(links) > 5:  # 有足够的链接说明是内容区域
-            link_score = min(len(links) * 2, 30)
+        if link_count > 5:  # 有足够的链接说明是内容区域
+            link_score = min(link_count * 2, 30)
             score += link_score
-            debug_info.append(f"链接内容: +{link_score} ({len(links)}个链接)")
+            if verbose:
+                debug_info.append(f"链接内容: +{link_score} ({link_count}个链接)")
         
         # 10. 最后检查：避免导航类内容（但权重降低，因为第一轮已经过滤了大部分）
         if items and len(items) > 2:
             # 只检查明显的导航词汇，减少误判
-            strong_nav_words = [
-                '登录', '注册', '首页', '主页', '无障碍', '办事', '无障碍浏览','打印','收藏','机构概况','在线服务','互动交流',
-                '走进', '移动版', '手机版', '导航', '菜单', '搜索', '市政府',
-                'login', 'register', 'home', 'menu', 'search', 'nav'
-            ]
             nav_word_count = 0
             
             for item in items[:8]:  # 减少检查的项目数
-                item_text = item.text_content().strip().lower()
-                for nav_word in strong_nav_words:
-                    if nav_word in item_text:
-                        nav_word_count += 1
-                        break
+                item_text = cache.text_lower(item)
+                if _LIST_NAV_MATCHER.any(item_text):
+                    nav_word_count += 1
             
             checked_items = min(len(items), 8)
             if nav_word_count > checked_items * 0.4:  # 提高阈值，减少误判
                 nav_penalty = 30  # 减少导航词汇的减分
                 score -= nav_penalty
-                debug_info.append(f"导航词汇: -{nav_penalty} ({nav_word_count}/{checked_items}个)")
+                if verbose:
+                    debug_info.append(f"导航词汇: -{nav_penalty} ({nav_word_count}/{checked_items}个)")
         
-        # 输出调试信息
+        # 输出调试信息（日志级别高于INFO时不生成）
+        if not verbose:
+            return score, ()
         container_info = f"标签:{tag_name}, 类名:{classes[:30]}{'...' if len(classes) > 30 else ''}"
         if elem_id:
             container_info += f", ID:{elem_id[:20]}{'...' if len(elem_id) > 20 else ''}"
         
-        logger.info(f"容器评分: {score} - {container_info}")
-        for info in debug_info:  # 显示更多调试信息
-            logger.info(f"  {info}")
+        messages = [f"容器评分: {score} - {container_info}"]
+        messages.extend(f"  {info}" for info in debug_info)  # 显示更多调试信息
         
-        return score
+        return score, messages
     
     # 第一层：找到所有可能的列表项
     all_items = []
-    for selector in list_selectors:
-        items = page_tree.xpath(selector)
+    for selector in _XP_LIST_SELECTORS:
+        items = selector(page_tree)
         all_items.extend(items)
     
     if not all_items:
         return None
     
-    # 按照父元素分组，找到包含列表项的父元素
-    parent_counts = {}
-    for item in all_items:
-        parent = item.getparent()
-        if parent is not None:
-            if parent not in parent_counts:
-                parent_counts[parent] = 0
-            parent_counts[parent] += 1
+    # 按照父元素分组，找到包含列表项的父元素（Counter 在C层计数，顺序与首次出现一致）
+    parent_counts = Counter(item.getparent() for item in all_items)
+    parent_counts.pop(None, None)
     
     if not parent_counts:
         return None
@@ -2195,77 +2731,79 @@ def find_list_container(page_tree):
     
     # 对候选容器进行评分并排序
     scored_containers = []
+    footer_cache = {}
+    # 候选容器的祖先大量重叠，每个元素自身的结构、内容减分只算一次
+    structure_penalty_cache = {}
+    content_penalty_cache = {}
+    
+    # 检查其他负面祖先特征 - 但权重降低，因为第一轮已经过滤了大部分
+    def check_negative_ancestry(element):
+        """检查元素及其祖先的负面特征"""
+        penalty = 0
+        for depth, (current, classes, elem_id) in enumerate(ancestor_chain(element)[:4]):  # 减少检查层级
+            # 检查结构特征，每个命中的关键词减20分（减少祖先特征的权重）
+            structure_penalty = structure_penalty_cache.get(current)
+            if structure_penalty is None:
+                structure_penalty = structure_penalty_cache[current] = 20 * _ANCESTRY_STRUCTURE_MATCHER.count(classes, elem_id)
+            penalty += structure_penalty
+            
+            # 检查内容特征（只在前2层检查，也只在这里取小写文本）
+            if depth < 2:
+                content_penalty = content_penalty_cache.get(current)
+                if content_penalty is None:
+                    text_content = cache.text_lower(current)
+                    content_penalty = content_penalty_cache[current] = 15 * _ANCESTRY_CONTENT_MATCHER.count(text_content)
+                
+                if content_penalty > 30:  # 如果包含多个关键词
+                    penalty += content_penalty
+        return penalty
+    
     for container, count in candidate_containers:
         score = calculate_container_score(container)
         
         # 额外检查：如果容器在footer区域，严重减分
-        is_footer, footer_msg = is_in_footer_area(container)
+        is_footer, footer_msg = is_in_footer_area(container, footer_cache)
         ancestry_penalty = 0
         
         if is_footer:
             ancestry_penalty += 50  # footer区域严重减分
         
-        # 检查其他负面祖先特征 - 但权重降低，因为第一轮已经过滤了大部分
-        def check_negative_ancestry(element):
-            """检查元素及其祖先的负面特征"""
-            penalty = 0
-            current = element
-            depth = 0
-            while current is not None and depth < 4:  # 减少检查层级
-                classes = current.get('class', '').lower()
-                elem_id = current.get('id', '').lower()
-                text_content = current.text_content().lower()
-                
-                # 检查结构特征
-                negative_keywords = ['nav', 'menu', 'sidebar', 'header', 'topbar', 'navigation', 'head']
-                for keyword in negative_keywords:
-                    if keyword in classes or keyword in elem_id:
-                        penalty += 20  # 减少祖先特征的权重
-                
-                # 检查内容特征（只在前2层检查）
-                if depth < 2:
-                    footer_content_keywords = ['网站说明', '网站标识码', '版权所有', '备案号']
-                    header_content_keywords = ['登录', '注册', '首页', '无障碍']
-                    
-                    content_penalty = 0
-                    for keyword in footer_content_keywords + header_content_keywords:
-                        if keyword in text_content:
-                            content_penalty += 15
-                    
-                    if content_penalty > 30:  # 如果包含多个关键词
-                        penalty += content_penalty
-                
-                current = current.getparent()
-                depth += 1
-            return penalty
-        
         ancestry_penalty += check_negative_ancestry(container)
         #最终分数
         final_score = score - ancestry_penalty
         
         scored_containers.append((container, final_score, count))
     
-    # 按分数排序，但优先考虑分数而不是数量
-    scored_containers.sort(key=lambda x: x[1], reverse=True)
+    # 选择得分最高的容器（分数相同时取先出现的），优先考虑分数而不是数量
+    # 原先的正分 / 宽松阈值(-50) / 兜底三档筛选取到的都是排序后的第一个，即得分最高者
+    best_container, _, _ = max(scored_containers, key=lambda x: x[1])
+    max_items = parent_counts[best_container]
     
-    # 严格过滤负分容器 - 提高阈值，更严格地排除首部尾部
-    positive_scored = [sc for sc in scored_containers if sc[1] > 0]  # 只接受正分容器
+    # 向上搜索时本轮的父级会成为下一轮的第2层祖先，每个元素的内容负面特征只判断一次
+    negative_content_cache = {}
     
-    if positive_scored:
-        # 选择得分最高的正分容器
-        best_container = positive_scored[0][0]
-        max_items = parent_counts[best_container]
-    else:
-        # 如果没有正分容器，尝试稍微宽松的阈值
-        moderate_scored = [sc for sc in scored_containers if sc[1] > -50]
-        
-        if moderate_scored:
-            best_container = moderate_scored[0][0]
-            max_items = parent_counts[best_container]
-        else:
-            # 最后手段：选择得分最高的（但很可能不理想）
-            best_container = scored_containers[0][0]
-            max_items = parent_counts[best_container]
+    # 检查父级元素是否包含footer等负面特征 - 更严格的检查
+    def has_negative_ancestor(element):
+        """检查元素的祖先是否包含负面特征 - 包括内容特征"""
+        for depth, (current, parent_classes, parent_id) in enumerate(ancestor_chain(element)[:3]):  # 检查3层祖先
+            parent_tag = current.tag
+            
+            # 检查结构负面关键词
+            if parent_tag in _PAGE_LEVEL_TAGS or _NEGATIVE_ANCESTOR_STRUCTURE_MATCHER.any(parent_classes, parent_id):
+                return True
+            
+            # 检查内容负面特征（只在前2层检查，避免过度检查；文本也只在这里取）
+            if depth < 2:
+                negative_content = negative_content_cache.get(current)
+                if negative_content is None:
+                    parent_text = cache.text_lower(current)
+                    # 首部、尾部内容特征
+                    header_found, footer_found = _NEGATIVE_ANCESTOR_CONTENT_KEYWORDS.found(parent_text)
+                    # 如果包含多个首部或尾部关键词，认为是负面祖先
+                    negative_content = negative_content_cache[current] = len(header_found) >= 2 or len(footer_found) >= 2
+                if negative_content:
+                    return True
+        return False
     
     # 逐层向上搜索优化容器
     current_container = best_container
@@ -2274,43 +2812,6 @@ def find_list_container(page_tree):
         if parent is None or parent.tag == 'html':
             break
         
-        # 检查父级元素是否包含footer等负面特征 - 更严格的检查
-        def has_negative_ancestor(element):
-            """检查元素的祖先是否包含负面特征 - 包括内容特征"""
-            current = element
-            depth = 0
-            while current is not None and depth < 3:  # 检查3层祖先
-                parent_classes = current.get('class', '').lower()
-                parent_id = current.get('id', '').lower()
-                parent_tag = current.tag.lower()
-                parent_text = current.text_content().lower()
-                
-                # 检查结构负面关键词
-                structure_negative = ['footer', 'nav', 'menu', 'sidebar', 'header', 'topbar', 'navigation', 'foot', 'head']
-                for keyword in structure_negative:
-                    if (keyword in parent_classes or keyword in parent_id or parent_tag in ['footer', 'header', 'nav']):
-                        return True
-                
-                # 检查内容负面特征（只在前2层检查，避免过度检查）
-                if depth < 2:
-                    # 首部内容特征
-                    header_content = ['登录', '注册', '首页', '主页', '无障碍', '办事', '走进']
-                    header_count = sum(1 for word in header_content if word in parent_text)
-                    
-                    # 尾部内容特征
-                    footer_content = ['网站说明', '网站标识码', '版权所有', '备案号', 'icp', '主办单位', '承办单位']
-                    footer_count = sum(1 for word in footer_content if word in parent_text)
-                    
-                    # 如果包含多个首部或尾部关键词，认为是负面祖先
-                    if header_count >= 2:
-                        return True
-                    if footer_count >= 2:
-                        return True
-                
-                current = current.getparent()
-                depth += 1
-            return False
-        
         # 如果父元素或其祖先包含负面特征，停止向上搜索
         if has_negative_ancestor(parent):
             logger.info("父级包含负面特征，停止向上搜索")
@@ -2388,10 +2889,12 @@ def find_list_container(page_tree):
                 logger.info(f"父级不符合条件 (项目数: {parent_items}, 得分: {parent_score})，保持当前选择")
     
     return current_container
-def generate_xpath(element):
-    if not element:
-        return None
+def _same_tag_position(element):
+    """元素在同名兄弟中的序号（从1开始），前面的同名兄弟由 itersiblings 在C层筛选"""
+    return sum(1 for _ in element.itersiblings(element.tag, preceding=True)) + 1
 
+def _identifier_xpath(element):
+    """用元素自身的标识（ID、类名或其他属性）生成 XPath，没有可用标识时返回 None"""
     tag = element.tag
 
     # 1. 优先使用ID（如果存在且不是干扰特征）
@@ -2420,81 +2923,63 @@ def generate_xpath(element):
         if attr_value and not is_interference_identifier(attr_value):
             return f"//{tag}[@{attr}='{attr_value}']"
 
-    # 4. 尝试找到最近的有干净标识符的祖先
-    def find_closest_clean_identifier(el):
-        parent = el.getparent()
-        while parent is not None and parent.tag != 'html':
-            # 检查ID
-            parent_id = parent.get('id')
-            if parent_id and not is_interference_identifier(parent_id):
-                return parent
-            
-            # 检查类名
-            parent_classes = parent.get('class')
-            if parent_classes:
-                parent_class_list = [cls.strip() for cls in parent_classes.split() if cls.strip()]
-                clean_parent_classes = [cls for cls in parent_class_list if not is_interference_identifier(cls)]
-                if clean_parent_classes:
-                    return parent
-            parent = parent.getparent()
+    return None
+
+def _has_clean_identifier(element):
+    """元素的ID或任一类名不含干扰特征"""
+    elem_id = element.get('id')
+    if elem_id and not is_interference_identifier(elem_id):
+        return True
+    classes = element.get('class')
+    if classes:
+        return any(not is_interference_identifier(cls) for cls in classes.split())
+    return False
+
+def generate_xpath(element):
+    if not element:
         return None
 
-    ancestor = find_closest_clean_identifier(element)
-    if ancestor is not None:
-        # 生成祖先的 XPath
-        ancestor_xpath = generate_xpath(ancestor)
-        if ancestor_xpath:
+    xpath = _identifier_xpath(element)
+    if xpath:
+        return xpath
+
+    # 4. 一次向上遍历：找到最近的有干净标识符的祖先，同时记下途经的元素
+    #    祖先一定有干净的ID或类名，它的 XPath 直接由 _identifier_xpath 生成，无需递归
+    path_elements = [element]
+    parent = element.getparent()
+    while parent is not None and parent.tag != 'html':
+        if _has_clean_identifier(parent):
             # 生成从祖先到当前元素的相对路径
-            def generate_relative_path(ancestor_el, target_el):
-                path = []
-                current = target_el
-                while current is not None and current != ancestor_el:
-                    index = 1
-                    sibling = current.getprevious()
-                    while sibling is not None:
-                        if sibling.tag == current.tag:
-                            index += 1
-                        sibling = sibling.getprevious()
-                    path.insert(0, f"{current.tag}[{index}]")
-                    current = current.getparent()
-                return '/' + '/'.join(path)
-
-            relative_path = generate_relative_path(ancestor, element)
-            return f"{ancestor_xpath}{relative_path}"
+            relative_path = '/'.join(
+                f"{current.tag}[{_same_tag_position(current)}]" for current in reversed(path_elements)
+            )
+            return f"{_identifier_xpath(parent)}/{relative_path}"
+        path_elements.append(parent)
+        parent = parent.getparent()
 
     # 5. 基于位置的 XPath（最后手段）
     path = []
     current = element
     while current is not None and current.tag != 'html':
-        index = 1
-        sibling = current.getprevious()
-        while sibling is not None:
-            if sibling.tag == current.tag:
-                index += 1
-            sibling = sibling.getprevious()
-        path.insert(0, f"{current.tag}[{index}]")
+        path.append(f"{current.tag}[{_same_tag_position(current)}]")
         current = current.getparent()
 
-    return '/' + '/'.join(path)
+    # 路径由下往上收集，拼接时再倒序
+    return '/' + '/'.join(reversed(path))
+
+# 干扰关键词
+_RE_INTERFERENCE_IDENTIFIER = _compile_indicators([
+    'header', 'footer', 'nav', 'navigation', 'menu', 'menubar',
+    'topbar', 'bottom', 'sidebar', 'aside', 'banner', 'ad'
+])
 
 def is_interference_identifier(identifier):
     """判断标识符是否包含干扰特征"""
     if not identifier:
         return False
     
-    identifier_lower = identifier.lower()
-    
-    # 干扰关键词
-    interference_keywords = [
-        'header', 'footer', 'nav', 'navigation', 'menu', 'menubar',
-        'topbar', 'bottom', 'sidebar', 'aside', 'banner', 'ad'
-    ]
-    
-    for keyword in interference_keywords:
-        if keyword in identifier_lower:
-            return True
-    
-    return False
+    # 先转小写再匹配（不用忽略大小写的正则，它会把 ſ、ı 等字符也当作 s、i）
+    return _RE_INTERFERENCE_IDENTIFIER.search(identifier.lower()) is not None
 
 # 移除了验证函数，现在只需要核心的HTML处理
 
@@ -2503,6 +2988,10 @@ def is_interference_identifier(identifier):
 
 
 # FastAPI路由
+# 提取是CPU密集的同步代码，放到线程池里执行，避免阻塞事件循环；每个线程有自己的解析器
+EXTRACT_WORKERS = os.cpu_count() or 1
+_extract_pool = ThreadPoolExecutor(max_workers=EXTRACT_WORKERS, thread_name_prefix='extract')
+
 @app.get("/")
 async def root():
     """根路径，返回API信息"""
@@ -2524,12 +3013,13 @@ async def health_check():
     }
 
 @app.post("/extract", response_model=MarkdownOutput)
-async def extract_html_to_markdown(input_data: HTMLInput):
+async def extract_html_to_markdown(input_data: HTMLInput, use_cache: bool = False):
     """
     从HTML内容中提取正文并转换为Markdown格式
     
     Args:
         input_data: 包含HTML内容的输入数据
+        use_cache: 查询参数，为true时相同的HTML直接返回缓存的结果
         
     Returns:
         MarkdownOutput: 包含Markdown内容、XPath和状态的响应
@@ -2541,7 +3031,10 @@ async def extract_html_to_markdown(input_data: HTMLInput):
         logger.info("开始处理HTML内容提取")
         
         # 提取内容并转换为Markdown
-        result = extract_content_to_markdown(input_data.html_content)
+        extract = extract_content_to_markdown_cached if use_cache else extract_content_to_markdown
+        result = await asyncio.get_running_loop().run_in_executor(
+            _extract_pool, extract, input_data.html_content
+        )
         
         if result['status'] == 'failed':
             raise HTTPException(status_code=422, detail="无法从HTML中提取有效内容")